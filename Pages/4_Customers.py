@@ -4,6 +4,11 @@ from sqlalchemy import create_engine
 import plotly.express as px
 # NEW: Import your central engine logic
 from database import get_engine
+from query_registry import register
+from fraud_types import categorical
+from overview_service import period_bounds
+from customer_search import CustomerIndex
+from customer_service import list_subjects, customer_years, customer_summary, daily_spend, beneficiary_totals, ledger_page
 
 # 1. Config & Setup
 st.set_page_config(page_title="Customer 360", page_icon="👤", layout="wide")
@@ -12,66 +17,84 @@ st.set_page_config(page_title="Customer 360", page_icon="👤", layout="wide")
 # This now pulls credentials from your secure .env file
 engine = get_engine()
 
-@st.cache_data
-def load_data():
+Q_PROFILE_BENEFICIARY = register("page_profile_beneficiary", "SELECT * FROM profile_beneficiary WHERE customer_id = :customer_id")
+Q_PROFILE_TIMELINE = register("page_profile_timeline", "SELECT * FROM profile_timeline WHERE customer_id = :customer_id")
+Q_PROFILE_DEVICE = register("page_profile_device", "SELECT * FROM profile_device_usage WHERE customer_id = :customer_id")
+Q_RECENT_TXNS = register("page_recent_txns", "SELECT * FROM transactions WHERE customer_id = :customer_id ORDER BY timestamp DESC LIMIT 50")
+
+# Search index over `customers`, shared by every session (same index as /customers/search)
+@st.cache_resource(ttl=600)
+def load_subject_index():
     try:
-        # UPDATED: Using the central engine instead of creating a local one with a password
-        conn = get_engine()
-        try:
-            df = pd.read_sql("SELECT * FROM v_enriched_transactions", conn)
-        except:
-            df = pd.read_sql("SELECT * FROM transactions", conn)
-        
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        subjects = list_subjects(engine)
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+        return None
+    return CustomerIndex(list(subjects.itertuples(index=False, name=None)))
+
+SEARCH_LIMIT = 50
+
+# Per-customer results, bounded so browsing many subjects keeps page memory flat
+CUSTOMER_CACHE_ENTRIES = 64
+
+@st.cache_data(ttl=60, max_entries=CUSTOMER_CACHE_ENTRIES)
+def load_years(customer_id):
+    return customer_years(engine, customer_id)
+
+@st.cache_data(ttl=60, max_entries=CUSTOMER_CACHE_ENTRIES)
+def load_period(customer_id, start, end):
+    return (customer_summary(engine, customer_id, start, end),
+            daily_spend(engine, customer_id, start, end),
+            beneficiary_totals(engine, customer_id, start, end))
+
+@st.cache_data(ttl=60, max_entries=CUSTOMER_CACHE_ENTRIES)
+def load_ledger(customer_id, start, end, cursor):
+    return ledger_page(engine, customer_id, start, end, cursor)
 
 # 2. Main Title
 st.title("👤 Customer 360° Forensics")
-df = load_data()
+subject_index = load_subject_index()
 
-if not df.empty:
+if subject_index is not None and len(subject_index):
     col_search, col_time = st.columns([1, 2])
     
     # --- Sidebar / Top Bar Selection ---
     with col_search:
-        subjects = df[['customer_id', 'customer_name']].drop_duplicates().sort_values('customer_id')
-        options = subjects.apply(lambda x: f"{x['customer_name']} (ID: {x['customer_id']})", axis=1)
-        selected_option = st.selectbox("Select Target Subject", options)
-        selected_id = int(selected_option.split("(ID: ")[1].replace(")", ""))
+        query = st.text_input("Search Subject", placeholder="Name or customer ID")
+        matches = dict(subject_index.search(query, SEARCH_LIMIT))
+        selected_id = st.selectbox("Select Target Subject", list(matches),
+                                   format_func=lambda cid: f"{matches[cid] or 'Unknown'} (ID: {cid})")
 
-    cust_data_raw = df[df['customer_id'] == selected_id]
+    years = load_years(selected_id) if selected_id is not None else []
 
-    if not cust_data_raw.empty:
+    if selected_id is None:
+        st.info("No customer matches that search.")
+    elif years:
         with col_time:
-            # Time Filter Logic
+            # Time Filter Logic (pushed down as a timestamp range)
             period_type = st.radio("Timeframe", ('All Time', 'Yearly', 'Quarterly', 'Monthly'), horizontal=True)
-            cust_data = cust_data_raw.copy()
-            years = sorted(cust_data['timestamp'].dt.year.unique(), reverse=True)
+            sel_year = q_num = sel_month = None
             
             if period_type == 'Yearly':
                 sel_year = st.selectbox("Select Year", years)
-                cust_data = cust_data[cust_data['timestamp'].dt.year == sel_year]
             elif period_type == 'Quarterly':
                 sel_year = st.selectbox("Select Year", years)
                 sel_q = st.selectbox("Quarter", ['Q1', 'Q2', 'Q3', 'Q4'])
                 q_num = int(sel_q.replace("Q",""))
-                cust_data = cust_data[(cust_data['timestamp'].dt.year == sel_year) & (cust_data['timestamp'].dt.quarter == q_num)]
             elif period_type == 'Monthly':
                 sel_year = st.selectbox("Select Year", years)
                 sel_month = st.selectbox("Month", range(1,13))
-                cust_data = cust_data[(cust_data['timestamp'].dt.year == sel_year) & (cust_data['timestamp'].dt.month == sel_month)]
+            start, end = period_bounds(period_type, sel_year, q_num, sel_month)
+
+        summary, daily, beneficiaries = load_period(selected_id, start, end)
 
         # --- Profile Header (Metrics) ---
         st.markdown("---")
-        city = cust_data.iloc[0]['city'] if 'city' in cust_data.columns else "Unknown"
-        fraud_tx = cust_data[cust_data['is_fraud'] == 1]
+        city = summary['city'] or "Unknown"
         
-        if not fraud_tx.empty:
+        if summary['alerts']:
             status = "🔴 HIGH RISK"
-            reason = fraud_tx['fraud_type'].mode()[0]
+            reason = summary['reason']
             st.error(f"⚠️ Flagged for **{reason}**")
         else:
             status = "🟢 Low Risk"
@@ -80,38 +103,52 @@ if not df.empty:
         k1, k2, k3, k4 = st.columns(4)
         k1.metric("Customer ID", selected_id)
         k2.metric("Home Branch", city)
-        k3.metric("Volume", f"₹{cust_data['amount'].sum():,.2f}")
-        k4.metric("Status", status, delta=reason, delta_color="inverse" if not fraud_tx.empty else "normal")
+        k3.metric("Volume", f"₹{summary['volume']:,.2f}")
+        k4.metric("Status", status, delta=reason, delta_color="inverse" if summary['alerts'] else "normal")
 
         st.markdown("---")
 
-        if not cust_data.empty:
+        if summary['txns']:
             # --- Visualizations ---
             g1, g2 = st.columns(2)
             with g1:
                 st.subheader("📉 Spending Trend")
-                cust_data['date'] = cust_data['timestamp'].dt.strftime('%Y-%m-%d')
-                trend = cust_data.groupby('date')['amount'].sum().reset_index()
-                fig = px.line(trend, x='date', y='amount')
+                fig = px.line(daily, x='date', y='amount')
                 st.plotly_chart(fig, use_container_width=True)
 
             with g2:
                 st.subheader("🕸️ Beneficiary Network")
                 ben_col = 'beneficiary_account'
-                ben = cust_data.groupby(ben_col)['amount'].sum().reset_index().head(10)
-                fig = px.bar(ben, x='amount', y=ben_col, orientation='h')
+                fig = px.bar(beneficiaries, x='amount', y=ben_col, orientation='h')
                 st.plotly_chart(fig, use_container_width=True)
 
             # --- LEDGER SECTION ---
             st.subheader("📄 Ledger (Filtered View)")
+
+            # Keyset pagination: one cursor per page visited for this customer and period
+            ledger_key = (selected_id, start, end)
+            if st.session_state.get('ledger_key') != ledger_key:
+                st.session_state['ledger_key'] = ledger_key
+                st.session_state['ledger_cursors'] = [None]
+            cursors = st.session_state['ledger_cursors']
+            page, next_cursor = load_ledger(selected_id, start, end, cursors[-1])
             
             def highlight_fraud(row):
                 return ['background-color: #ffe6e6']*len(row) if row.get('is_fraud')==1 else ['']*len(row)
             
+            page = page.assign(crime_type=categorical(page['fraud_code']))
             st.dataframe(
-                cust_data.sort_values('timestamp', ascending=False).style.apply(highlight_fraud, axis=1), 
+                page.style.apply(highlight_fraud, axis=1), 
                 use_container_width=True
             )
+            p1, p2, p3 = st.columns([1, 1, 4])
+            if p1.button("⬅️ Newer", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+            if p2.button("Older ➡️", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
+            p3.caption(f"Page {len(cursors)} · {summary['txns']:,} transactions in period")
 
             # --- NEW FEATURE STORE VIEWER SECTION (Below Ledger) ---
             st.markdown("---")
@@ -123,32 +160,28 @@ if not df.empty:
                 st.caption(f"A -> B relationship strength for Customer {selected_id}")
                 try:
                     # Filtered by selected_id
-                    query = f"SELECT * FROM profile_beneficiary WHERE customer_id = {selected_id}"
-                    st.dataframe(pd.read_sql(query, engine), use_container_width=True)
+                    st.dataframe(Q_PROFILE_BENEFICIARY.frame(engine, {"customer_id": int(selected_id)}), use_container_width=True)
                 except Exception as e: st.warning("No beneficiary profile data found.")
 
             with tab2:
                 st.caption(f"Global Spending Velocity for Customer {selected_id}")
                 try:
                     # Filtered by selected_id
-                    query = f"SELECT * FROM profile_timeline WHERE customer_id = {selected_id}"
-                    st.dataframe(pd.read_sql(query, engine), use_container_width=True)
+                    st.dataframe(Q_PROFILE_TIMELINE.frame(engine, {"customer_id": int(selected_id)}), use_container_width=True)
                 except: st.warning("No timeline profile data found.")
 
             with tab3:
                 st.caption(f"Digital Fingerprints for Customer {selected_id}")
                 try:
                     # Filtered by selected_id
-                    query = f"SELECT * FROM profile_device_usage WHERE customer_id = {selected_id}"
-                    st.dataframe(pd.read_sql(query, engine), use_container_width=True)
+                    st.dataframe(Q_PROFILE_DEVICE.frame(engine, {"customer_id": int(selected_id)}), use_container_width=True)
                 except: st.warning("No device profile data found.")
 
             with tab4:
                 st.caption(f"Full Transaction History (Unfiltered by Time slider) for Customer {selected_id}")
                 try:
                     # Filtered by selected_id, but showing last 50 transactions regardless of the Time Slider above
-                    query = f"SELECT * FROM transactions WHERE customer_id = {selected_id} ORDER BY timestamp DESC LIMIT 50"
-                    st.dataframe(pd.read_sql(query, engine), use_container_width=True)
+                    st.dataframe(Q_RECENT_TXNS.frame(engine, {"customer_id": int(selected_id)}), use_container_width=True)
                 except: st.warning("No transaction data found.")
 
         else:
@@ -1,26 +1,183 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
-from sqlalchemy import create_engine, text
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import create_engine
 from datetime import datetime, timedelta
-import numpy as np
+from typing import List
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+import asyncio
+import os
+import time
+import threading
 
 # ==========================================
 #   SECTION 1: SETUP & CONFIGURATION
 # ==========================================
+# Import-light startup: pandas, NumPy and the model files are not touched at import time.
+# The ML judges load in the background once the app starts (or on first use), DB work
+# happens in the lifespan, and /ready turns green when models and caches are warm.
+# API_LAZY_MODELS=0 loads the models at import instead.
 
-from judges.pattern_model import PatternModel
-from judges.anomaly_model import AnomalyModel
 from judges.network_model import NetworkModel
+from judges.graph_index import GraphIndex
 
 # NEW: Import your central engine and config
-from database import get_engine, get_db_config
+from database import get_engine, get_db_config, get_async_engine, get_all_pool_stats, dispose_engines
+from feature_store import FeatureStore
+from customer_cache import CustomerCache
+from txn_logger import TransactionLogger, TXN_COLUMNS
+from profile_updater import ProfileUpdater
+from rolling_profiles import RollingProfiles
+from rollups import RollupUpdater
+import schema
+from fraud_types import fraud_code
+from query_registry import register, registry as query_registry
 
 # REPLACED: Hardcoded DB_CONN removed
+# (SQLAlchemy only connects on first checkout, i.e. in the lifespan warm-up)
 engine = get_engine()
 
-app = FastAPI()
+# Async engine for the scoring path (asyncpg), created in the lifespan. Without it, async
+# helpers fall back to the sync engine in a worker thread so the event loop is still never blocked.
+async_engine = None
+
+# Online Feature Store (warmed at startup, updated on every INSERT)
+feature_store = FeatureStore()
+# Graph Index behind the Network judge (same lifecycle)
+graph_index = GraphIndex()
+
+# Keeps the profile_* tables current: logged rows are upserted in batches, the view refreshed on a schedule
+profile_updater = ProfileUpdater.from_env(engine)
+
+# 1d/7d/30d/365d rolling aggregates per customer and per beneficiary pair (volume simulators)
+rolling_profiles = RollingProfiles.from_env()
+
+# Hour/day/month buckets per city and fraud type behind the Overview dashboard (txn_rollups)
+rollup_updater = RollupUpdater.from_env(engine)
+
+# Every in-memory store that mirrors `transactions`: warm(engine) once, record(row) per INSERT
+online_stores = [feature_store, graph_index, profile_updater, rolling_profiles, rollup_updater]
+
+# customer_id -> customer_name (reloads itself when generate_data.py resets the schema)
+customer_cache = CustomerCache.from_env(engine)
+
+# Write-behind logger: scored transactions are batched into Postgres off the request path
+transaction_logger = TransactionLogger.from_env(engine)
+
+# Bounded pool for the CPU-bound ML judges (keeps the event loop free while they score)
+judge_pool = ThreadPoolExecutor(max_workers=int(os.getenv("JUDGE_POOL_WORKERS", "4")), thread_name_prefix="judge")
+
+# Per-judge time budget; a judge that misses it is replaced by its degraded-mode fallback
+JUDGE_TIMEOUTS = {
+    "Pattern_Model": int(os.getenv("PATTERN_TIMEOUT_MS", "500")) / 1000,
+    "Anomaly_Model": int(os.getenv("ANOMALY_TIMEOUT_MS", "500")) / 1000,
+    "Network_Model": int(os.getenv("NETWORK_TIMEOUT_MS", "1000")) / 1000,
+}
+
+
+class LazyJudge:
+    """
+    Stands in for a judge and builds it on first use (thread-safe); load() does it ahead of traffic.
+    Any attribute lookup may build it, so async handlers look the judge up inside the judge pool
+    and use rules() for their fallbacks.
+    """
+
+    def __init__(self, module, cls):
+        self._module = module
+        self._cls = cls
+        self._judge = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._judge is not None
+
+    def load(self):
+        if self._judge is None:
+            with self._lock:
+                if self._judge is None:
+                    self._judge = getattr(import_module(self._module), self._cls)()
+        return self._judge
+
+    def rules(self, *args):
+        """Degraded-mode verdict from the judge's deterministic rules; never builds the judge."""
+        judge = self._judge
+        if judge is None:
+            return 0.0, "Judge Not Ready"
+        return judge._apply_rules(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+
+pattern_engine = LazyJudge("judges.pattern_model", "PatternModel")
+anomaly_engine = LazyJudge("judges.anomaly_model", "AnomalyModel")
+# UPDATED: Passing the secure config string to the NetworkModel (no model file, cheap to build)
+network_engine = NetworkModel(get_db_config(), graph_index=graph_index)
+
+def load_models():
+    """Load both ML judges now (serve.py calls this before forking, the lifespan in the background)."""
+    try:
+        pattern_engine.load()
+        anomaly_engine.load()
+        print("✅ Models Loaded Successfully")
+    except Exception as e:
+        print(f"⚠️ Warning: Models not loaded. {e}")
+
+if os.getenv("API_LAZY_MODELS", "1").lower() in ("0", "false", "no"):
+    load_models()
+
+schema_ready = False
+
+@asynccontextmanager
+async def lifespan(app):
+    global async_engine, schema_ready
+    # Models load in a thread while the DB warm-up below runs
+    models_loading = asyncio.get_running_loop().run_in_executor(None, load_models)
+    try:
+        async_engine = get_async_engine()
+    except Exception as e:
+        async_engine = None
+        print(f"⚠️ Warning: Async DB driver unavailable, using threadpool fallback. {e}")
+    network_engine.async_engine = async_engine
+
+    # A database from an older generate_data.py gets the columns/tables the stores below expect
+    try:
+        applied = schema.upgrade(engine)
+        schema_ready = True
+        print(f"✅ Schema upgraded: {', '.join(applied)}" if applied else "✅ Schema up to date")
+    except Exception as e:
+        print(f"⚠️ Warning: Schema out of date and not upgraded, re-run generate_data.py. {e}")
+
+    for store in online_stores:
+        try:
+            store.warm(engine)
+        except Exception as e:
+            print(f"⚠️ Warning: {type(store).__name__} not warmed, falling back to SQL. {e}")
+    try:
+        customer_cache.warm()
+    except Exception as e:
+        print(f"⚠️ Warning: Customer Cache not warmed, names load on demand. {e}")
+    customer_cache.start()
+    transaction_logger.start()
+    profile_updater.start()
+    rollup_updater.start()
+    yield
+    transaction_logger.stop()
+    profile_updater.stop()
+    rollup_updater.stop()
+    customer_cache.stop()
+    judge_pool.shutdown(wait=False)
+    if not models_loading.done():
+        models_loading.cancel()
+    if async_engine is not None:
+        await async_engine.dispose()
+    dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,43 +187,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-try:
-    pattern_engine = PatternModel()
-    anomaly_engine = AnomalyModel()
-    
-    # UPDATED: Passing the secure config string to the NetworkModel
-    network_engine = NetworkModel(get_db_config())
-    
-    print("✅ Models Loaded Successfully")
-except Exception as e:
-    print(f"⚠️ Warning: Models not loaded. {e}")
-
 
 # ==========================================
 #   SECTION 2: DATA MODELS
 # ==========================================
 
+# Text the endpoints write into `transactions` is capped at its VARCHAR(50) columns, so an
+# oversized value is a 422 here rather than a row Postgres rejects in the logger.
+# `period` / `scenario_type` are embedded in fraud_type ("Relationship Spike (...)", "GNN_...").
+TEXT_MAX = 50
+LABEL_MAX = 20
+
 class TransactionRequest(BaseModel):
     customer_id: int
     amount: float
-    device_id: str
-    beneficiary_account: str
+    device_id: str = Field(..., max_length=TEXT_MAX)
+    beneficiary_account: str = Field(..., max_length=TEXT_MAX)
     account_age_days: int
     timestamp: str = None
 
+class BatchTransactionRequest(BaseModel):
+    transactions: List[TransactionRequest]
+
 class GNNTransactionRequest(BaseModel):
     sender_id: int
     receiver_id: int
     amount: float
     is_gnn_active: bool
-    scenario_type: str = "star"
+    scenario_type: str = Field("star", max_length=LABEL_MAX)
 
 class PatternRequest(BaseModel):
     customer_id: int
     amount: float
-    device_id: str
-    beneficiary_account: str
-    city: str
+    device_id: str = Field(..., max_length=TEXT_MAX)
+    beneficiary_account: str = Field(..., max_length=TEXT_MAX)
+    city: str = Field(..., max_length=TEXT_MAX)
     hour: int
     is_active: bool
     is_velocity_attack: bool = False
@@ -84,23 +239,214 @@ def get_ist_time():
     return (datetime.utcnow() + timedelta(hours=5, minutes=30)).isoformat()
 
 def get_live_features(customer_id, amount, device_id):
-    try:
-        query_hist = f"""
-            SELECT SUM(amount) as total,
-            SUM(CASE WHEN payment_method_detail IN ('Electricity Bill', 'Rent', 'Metro Recharge') THEN 1 ELSE 0 END) as opex
-            FROM transactions WHERE customer_id = {customer_id}
-        """
-        stats = pd.read_sql(query_hist, engine).iloc[0]
-        opex_ratio = (stats['opex'] or 0) / ((stats['total'] or 0) + amount + 1)
-    except:
-        opex_ratio = 0.5 
-    try:
-        q_dev = f"SELECT COUNT(DISTINCT customer_id) FROM transactions WHERE device_id = '{device_id}'"
-        users_on_dev = pd.read_sql(q_dev, engine).iloc[0, 0]
-    except:
-        users_on_dev = 1
+    if feature_store.is_warm:
+        return feature_store.live_features(customer_id, amount, device_id)
+    return get_live_features_sql(customer_id, amount, device_id)
+
+# Hot-path queries: named, parameterized and prepared (see query_registry.py), timed per statement
+Q_CUSTOMER_HIST = register("customer_hist", """
+    SELECT SUM(amount) as total,
+    SUM(CASE WHEN payment_method_detail IN ('Electricity Bill', 'Rent', 'Metro Recharge') THEN 1 ELSE 0 END) as opex
+    FROM transactions WHERE customer_id = :customer_id
+""")
+Q_DEVICE_USERS = register("device_users", "SELECT COUNT(DISTINCT customer_id) FROM transactions WHERE device_id = :device_id")
+Q_BATCH_HIST = register("batch_hist", """
+    SELECT customer_id, SUM(amount) as total,
+    SUM(CASE WHEN payment_method_detail IN ('Electricity Bill', 'Rent', 'Metro Recharge') THEN 1 ELSE 0 END) as opex
+    FROM transactions WHERE customer_id = ANY(:ids) GROUP BY customer_id
+""")
+Q_BATCH_DEVICE_USERS = register("batch_device_users", """
+    SELECT device_id, COUNT(DISTINCT customer_id) FROM transactions
+    WHERE device_id = ANY(:devs) GROUP BY device_id
+""")
+Q_BATCH_NAMES = register("batch_names", "SELECT customer_id, customer_name FROM customers WHERE customer_id = ANY(:ids)")
+
+def get_live_features_sql(customer_id, amount, device_id):
+    with engine.connect() as conn:
+        try:
+            total, opex = Q_CUSTOMER_HIST.execute(conn, {"customer_id": customer_id}).fetchone()
+            opex_ratio = (opex or 0) / ((total or 0) + amount + 1)
+        except:
+            conn.rollback()
+            opex_ratio = 0.5 
+        try:
+            users_on_dev = Q_DEVICE_USERS.execute(conn, {"device_id": device_id}).scalar()
+        except:
+            users_on_dev = 1
     return [amount, opex_ratio, users_on_dev], users_on_dev
 
+async def query_one(stmt, params=None):
+    """Run a registered statement through the async engine (falls back to the sync engine in a worker thread)."""
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            return (await stmt.execute_async(conn, params)).fetchone()
+    def run():
+        with engine.connect() as conn:
+            return stmt.execute(conn, params).fetchone()
+    return await asyncio.to_thread(run)
+
+async def query_all(stmt, params=None):
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            return (await stmt.execute_async(conn, params)).fetchall()
+    def run():
+        with engine.connect() as conn:
+            return stmt.execute(conn, params).fetchall()
+    return await asyncio.to_thread(run)
+
+async def get_live_features_async(customer_id, amount, device_id):
+    """get_live_features for async handlers: the two SQL aggregates run concurrently."""
+    if feature_store.is_warm:
+        return feature_store.live_features(customer_id, amount, device_id)
+
+    async def opex_ratio():
+        try:
+            stats = await query_one(Q_CUSTOMER_HIST, {"customer_id": customer_id})
+            return (stats[1] or 0) / ((stats[0] or 0) + amount + 1)
+        except:
+            return 0.5
+    async def users_on_dev():
+        try:
+            return (await query_one(Q_DEVICE_USERS, {"device_id": device_id}))[0]
+        except:
+            return 1
+
+    ratio, users = await asyncio.gather(opex_ratio(), users_on_dev())
+    return [amount, ratio, users], users
+
+async def get_live_features_batch(txs):
+    """Same features as get_live_features, but 2 grouped queries (run concurrently) for the whole batch."""
+    if feature_store.is_warm:
+        return [feature_store.live_features(tx.customer_id, tx.amount, tx.device_id) for tx in txs]
+
+    async def grouped(sql, params):
+        try:
+            return {r[0]: r[1:] for r in await query_all(sql, params)}
+        except:
+            return None
+    hist, dev_counts = await asyncio.gather(
+        grouped(Q_BATCH_HIST, {"ids": sorted({tx.customer_id for tx in txs})}),
+        grouped(Q_BATCH_DEVICE_USERS, {"devs": sorted({tx.device_id for tx in txs})}),
+    )
+
+    results = []
+    for tx in txs:
+        if hist is None:
+            opex_ratio = 0.5
+        else:
+            total, opex = hist.get(tx.customer_id, (None, None))
+            opex_ratio = (opex or 0) / ((total or 0) + tx.amount + 1)
+        users_on_dev = 1 if dev_counts is None else dev_counts.get(tx.device_id, (0,))[0]
+        results.append(([tx.amount, opex_ratio, users_on_dev], users_on_dev))
+    return results
+
+async def get_customer_name_async(customer_id):
+    return (await get_customer_names_async([customer_id]))[customer_id]
+
+async def get_customer_names_async(customer_ids):
+    """Names from the customer cache; only misses go to the DB (one query), and are cached."""
+    names = {}
+    missing = []
+    for cid in set(customer_ids):
+        hit, name = customer_cache.lookup(cid)
+        if hit:
+            names[cid] = name
+        else:
+            missing.append(cid)
+    if missing:
+        try:
+            found = {r[0]: r[1] for r in await query_all(Q_BATCH_NAMES, {"ids": sorted(missing)})}
+            for cid in missing:
+                names[cid] = found.get(cid)
+                customer_cache.put(cid, names[cid])
+        except:
+            pass
+    return {cid: names.get(cid) or f"User {cid}" for cid in customer_ids}
+
+def ensemble_verdict(p_pat, p_ano, v_ano, p_net, reasons_net):
+    """Weighted vote of the three judges -> (final_score, status, fraud_flag, fraud_type)"""
+    final_score = (p_pat * 0.4) + (p_ano * 0.3) + (p_net * 0.3)
+    status = "APPROVED"
+    fraud_flag = 0
+    fraud_type = "None"
+    
+    if final_score > 0.5 or p_net == 1.0:
+        status = "BLOCKED"
+        fraud_flag = 1
+        if p_net == 1.0:
+            if "Mule" in str(reasons_net): fraud_type = "Star Topology"
+            elif "Collision" in str(reasons_net): fraud_type = "Synthetic Identity"
+            elif "Cycle" in str(reasons_net): fraud_type = "Circular Topology"
+            else: fraud_type = "Network Anomaly"
+        elif v_ano == "Statistical Outlier" or "SHELL" in v_ano:
+            fraud_type = "Shell Operation"
+        else:
+            fraud_type = "Pattern Anomaly"
+    return final_score, status, fraud_flag, fraud_type
+
+def build_verdict_response(status, final_score, p_pat, v_pat, p_ano, v_ano, p_net, v_net, reasons_net, judge_stats=None):
+    breakdown = {
+        "Pattern_Model": {"score": round(p_pat, 2), "verdict": v_pat},
+        "Anomaly_Model": {"score": p_ano, "verdict": v_ano},
+        "Network_Model": {"score": p_net, "verdict": v_net, "details": reasons_net}
+    }
+    # Per-judge latency / ok|timeout|error, when the judges ran under run_judge
+    for name, stats in (judge_stats or {}).items():
+        breakdown[name].update(stats)
+    return {
+        "status": status,
+        "risk_score": round(final_score * 100, 2),
+        "model_breakdown": breakdown
+    }
+
+async def run_judge(name, work, fallback):
+    """
+    Await one judge under its own timeout -> (result, {"latency_ms", "judge_status"}).
+    On timeout or error the judge's degraded-mode fallback() stands in, so the
+    ensemble can still vote. (A timed-out pool thread finishes in the background.)
+    """
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(work, JUDGE_TIMEOUTS[name])
+        judge_status = "ok"
+    except asyncio.TimeoutError:
+        print(f"⚠️ Judge Timeout ({name}): using fallback")
+        result, judge_status = fallback(), "timeout"
+    except Exception as e:
+        print(f"⚠️ Judge Error ({name}): {e}")
+        result, judge_status = fallback(), "error"
+    return result, {"latency_ms": round((time.perf_counter() - start) * 1000, 3), "judge_status": judge_status}
+
+def run_in_judge_pool(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(judge_pool, fn, *args)
+
+def log_transactions(rows):
+    """
+    Single write path for scored transactions: queue them on the write-behind logger
+    (batched INSERT off the request path), then fold each row into the in-memory stores
+    so scoring sees it immediately. Missing columns are written as NULL.
+    """
+    rows = [txn_row(row) for row in rows]
+    transaction_logger.log(rows)
+    record_in_stores(rows)
+
+async def log_transactions_async(rows):
+    """log_transactions for async handlers: never blocks the loop (a full queue spills to disk)."""
+    rows = [txn_row(row) for row in rows]
+    transaction_logger.log(rows, timeout=0)
+    record_in_stores(rows)
+
+def txn_row(row):
+    """Handler dict -> `transactions` row: TXN_COLUMNS only, fraud_code assigned from is_fraud / fraud_type."""
+    row = {col: row.get(col) for col in TXN_COLUMNS}
+    row["fraud_code"] = fraud_code(row["is_fraud"], row["fraud_type"])
+    return row
+
+def record_in_stores(rows):
+    for row in rows:
+        for store in online_stores:
+            store.record(row)
+
 
 # ==========================================
 #   SECTION 4: CORE ANALYSIS ENDPOINT
@@ -109,88 +455,125 @@ def get_live_features(customer_id, amount, device_id):
 @app.post("/analyze_transaction/")
 async def analyze_transaction(tx: TransactionRequest):
     try:
-        base_features, users_on_dev = get_live_features(tx.customer_id, tx.amount, tx.device_id)
-        model_features = base_features + [tx.account_age_days]
-        
-        p_pat, v_pat = pattern_engine.assess(model_features)
-        p_ano, v_ano = anomaly_engine.assess(model_features)
-        p_net, v_net, reasons_net = network_engine.investigate(
-            device_id=tx.device_id, 
-            customer_id=tx.customer_id,
-            beneficiary_account=tx.beneficiary_account, 
-            amount=tx.amount
+        # The network judge only needs the request, so it starts right away (async I/O path)
+        network_judge = run_judge(
+            "Network_Model",
+            network_engine.investigate_async(
+                device_id=tx.device_id, 
+                customer_id=tx.customer_id,
+                beneficiary_account=tx.beneficiary_account, 
+                amount=tx.amount
+            ),
+            # Degraded mode: no graph evidence either way
+            lambda: (0.0, "Unavailable", []),
         )
+
+        async def ml_judges():
+            (base_features, users_on_dev), cust_name = await asyncio.gather(
+                get_live_features_async(tx.customer_id, tx.amount, tx.device_id),
+                get_customer_name_async(tx.customer_id),
+            )
+            model_features = base_features + [tx.account_age_days]
+            # CPU-bound judges score side by side in the judge pool;
+            # degraded mode keeps their deterministic rules (no ML score)
+            pattern, anomaly = await asyncio.gather(
+                run_judge("Pattern_Model", run_in_judge_pool(lambda f: pattern_engine.assess(f), model_features),
+                          lambda: pattern_engine.rules(0.0, model_features)),
+                run_judge("Anomaly_Model", run_in_judge_pool(lambda f: anomaly_engine.assess(f), model_features),
+                          lambda: anomaly_engine.rules(None, model_features)),
+            )
+            return cust_name, pattern, anomaly
+
+        (cust_name, ((p_pat, v_pat), pat_stats), ((p_ano, v_ano), ano_stats)), ((p_net, v_net, reasons_net), net_stats) = \
+            await asyncio.gather(ml_judges(), network_judge)
+        judge_stats = {"Pattern_Model": pat_stats, "Anomaly_Model": ano_stats, "Network_Model": net_stats}
         
-        final_score = (p_pat * 0.4) + (p_ano * 0.3) + (p_net * 0.3)
-        status = "APPROVED"
-        fraud_flag = 0
-        fraud_type = "None"
-        
-        if final_score > 0.5 or p_net == 1.0:
-            status = "BLOCKED"
-            fraud_flag = 1
-            if p_net == 1.0:
-                if "Mule" in str(reasons_net): fraud_type = "Star Topology"
-                elif "Collision" in str(reasons_net): fraud_type = "Synthetic Identity"
-                elif "Cycle" in str(reasons_net): fraud_type = "Circular Topology"
-                else: fraud_type = "Network Anomaly"
-            elif v_ano == "Statistical Outlier" or "SHELL" in v_ano:
-                fraud_type = "Shell Operation"
-            else:
-                fraud_type = "Pattern Anomaly"
-        
-        try:
-            name_q = text(f"SELECT customer_name FROM customers WHERE customer_id = {tx.customer_id}")
-            with engine.connect() as conn:
-                res = conn.execute(name_q).fetchone()
-                cust_name = res[0] if res else f"User {tx.customer_id}"
-        except: cust_name = f"User {tx.customer_id}"
+        final_score, status, fraud_flag, fraud_type = ensemble_verdict(p_pat, p_ano, v_ano, p_net, reasons_net)
 
         timestamp = tx.timestamp if tx.timestamp else get_ist_time()
-        insert_sql = text("""
-            INSERT INTO transactions 
-            (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, customer_account_number, city, payment_method_detail, is_fraud, fraud_type)
-            VALUES 
-            (:cust_id, :c_name, :amt, :time, :dev, :ben, :acc_num, 'Mumbai', 'API Request', :is_fraud, :f_type)
-        """)
-        with engine.begin() as conn:
-            conn.execute(insert_sql, {
-                "cust_id": tx.customer_id, "c_name": cust_name, "amt": tx.amount, "time": timestamp, 
-                "dev": tx.device_id, "ben": tx.beneficiary_account, "acc_num": f"ACC_{tx.customer_id}", 
-                "is_fraud": fraud_flag, "f_type": fraud_type
-            })
+        await log_transactions_async([{
+            "customer_id": tx.customer_id, "customer_name": cust_name, "amount": tx.amount, "timestamp": timestamp, 
+            "device_id": tx.device_id, "beneficiary_account": tx.beneficiary_account, "customer_account_number": f"ACC_{tx.customer_id}", 
+            "city": "Mumbai", "payment_method_detail": "API Request", "is_fraud": fraud_flag, "fraud_type": fraud_type
+        }])
 
-        return {
-            "status": status,
-            "risk_score": round(final_score * 100, 2),
-            "model_breakdown": {
-                "Pattern_Model": {"score": round(p_pat, 2), "verdict": v_pat},
-                "Anomaly_Model": {"score": p_ano, "verdict": v_ano},
-                "Network_Model": {"score": p_net, "verdict": v_net, "details": reasons_net}
-            }
-        }
+        return build_verdict_response(status, final_score, p_pat, v_pat, p_ano, v_ano, p_net, v_net, reasons_net, judge_stats)
     except Exception as e:
         print(f"API Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/analyze_transactions/batch")
+async def analyze_transactions_batch(req: BatchTransactionRequest):
+    """
+    Settlement-file scoring: features for the whole batch are gathered together,
+    the ML judges run one vectorized call each, results come back in input order.
+    """
+    txs = req.transactions
+    if not txs:
+        return {"count": 0, "results": []}
+    try:
+        # Cap concurrent per-row graph checks so a cold index can't drain the pool
+        network_slots = asyncio.Semaphore(5)
+        async def investigate(tx):
+            async with network_slots:
+                return await network_engine.investigate_async(
+                    device_id=tx.device_id,
+                    customer_id=tx.customer_id,
+                    beneficiary_account=tx.beneficiary_account,
+                    amount=tx.amount
+                )
+
+        live, names, network_results = await asyncio.gather(
+            get_live_features_batch(txs),
+            get_customer_names_async([tx.customer_id for tx in txs]),
+            asyncio.gather(*[investigate(tx) for tx in txs]),
+        )
+        model_features = [base + [tx.account_age_days] for (base, _), tx in zip(live, txs)]
+
+        # CPU-bound vectorized scoring stays off the event loop, both judges side by side
+        pattern_results, anomaly_results = await asyncio.gather(
+            run_in_judge_pool(lambda rows: pattern_engine.assess_batch(rows), model_features),
+            run_in_judge_pool(lambda rows: anomaly_engine.assess_batch(rows), model_features),
+        )
+
+        results = []
+        rows = []
+        for tx, (p_pat, v_pat), (p_ano, v_ano), (p_net, v_net, reasons_net) in zip(txs, pattern_results, anomaly_results, network_results):
+            final_score, status, fraud_flag, fraud_type = ensemble_verdict(p_pat, p_ano, v_ano, p_net, reasons_net)
+            results.append(build_verdict_response(status, final_score, p_pat, v_pat, p_ano, v_ano, p_net, v_net, reasons_net))
+            rows.append({
+                "customer_id": tx.customer_id, "customer_name": names[tx.customer_id], "amount": tx.amount,
+                "timestamp": tx.timestamp if tx.timestamp else get_ist_time(),
+                "device_id": tx.device_id, "beneficiary_account": tx.beneficiary_account, "customer_account_number": f"ACC_{tx.customer_id}",
+                "city": "Mumbai", "payment_method_detail": "API Request", "is_fraud": fraud_flag, "fraud_type": fraud_type
+            })
+
+        # One multi-row INSERT for the whole batch
+        await log_transactions_async(rows)
+
+        return {"count": len(results), "results": results}
+    except Exception as e:
+        print(f"Batch API Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==========================================
 #   SECTION 5: GNN DEMO LOGIC
 # ==========================================
 
+Q_ACTIVE_CUSTOMERS = register("active_customers", "SELECT DISTINCT customer_id FROM transactions ORDER BY customer_id ASC")
+
 @app.get("/get_customers")
 def get_customers():
     try:
-        with engine.connect() as conn:
-            # 1. Try fetching from Customers table first (if you have metadata)
-            try:
-                query = text("SELECT customer_id, customer_name FROM customers ORDER BY customer_id ASC")
-                result = conn.execute(query).fetchall()
-                customers = [{"id": row[0], "name": row[1]} for row in result]
-            except:
-                # 2. Fallback: Get ALL active IDs from Transactions table
-                query = text("SELECT DISTINCT customer_id FROM transactions ORDER BY customer_id ASC")
-                result = conn.execute(query).fetchall()
+        # 1. Serve from the customer cache (bulk loaded from the Customers table)
+        try:
+            customers = [{"id": cid, "name": name} for cid, name in customer_cache.all()]
+        except:
+            # 2. Fallback: Get ALL active IDs from Transactions table
+            with engine.connect() as conn:
+                result = Q_ACTIVE_CUSTOMERS.execute(conn).fetchall()
                 customers = [{"id": row[0], "name": f"User {row[0]}"} for row in result]
                 
         return {"customers": customers}
@@ -198,6 +581,34 @@ def get_customers():
         print(f"DB Error: {e}")
         return {"error": str(e), "customers": []}
 
+# Upper bound for /customers/search?limit=
+SEARCH_MAX_LIMIT = 100
+
+@app.get("/customers/search")
+def search_customers(q: str = "", limit: int = 20):
+    """Customer picker lookup: exact ID, then ID / name-word prefixes, then name substrings."""
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    try:
+        matches = customer_cache.search(q, limit)
+    except Exception as e:
+        print(f"DB Error: {e}")
+        return {"error": str(e), "customers": []}
+    return {"query": q, "customers": [{"id": cid, "name": name} for cid, name in matches]}
+
+Q_FAN_IN_SOURCES = register("fan_in_sources", """
+    SELECT customer_id FROM transactions WHERE beneficiary_account = :beneficiary_account GROUP BY customer_id LIMIT 12
+""")
+Q_CYCLE_TRACE = register("cycle_trace", """
+    SELECT t1.beneficiary_account as b_to_c, t2.beneficiary_account as c_to_a 
+    FROM transactions t1
+    JOIN transactions t2 ON t1.beneficiary_account = CONCAT('ACC_', t2.customer_id)
+    WHERE t1.customer_id = :receiver_id 
+    AND t2.beneficiary_account = :sender_account
+    LIMIT 1
+""")
+Q_SENDER_DEVICE = register("sender_device", "SELECT device_id FROM transactions WHERE customer_id = :customer_id LIMIT 1")
+Q_DEVICE_CUSTOMERS = register("device_customers", "SELECT DISTINCT customer_id FROM transactions WHERE device_id = :device_id LIMIT 15")
+
 @app.post("/analyze_gnn_transaction")
 def analyze_gnn_transaction(req: GNNTransactionRequest):
     try:
@@ -209,9 +620,7 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
         
         with engine.connect() as conn:
             # Get Names
-            def get_n(i):
-                r = conn.execute(text(f"SELECT customer_name FROM customers WHERE customer_id={i}")).fetchone()
-                return r[0] if r else f"User {i}"
+            get_n = customer_cache.name_or_default
             
             s_name = get_n(req.sender_id)
             r_name = get_n(req.receiver_id)
@@ -226,8 +635,7 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
                 edges.append({"from": req.sender_id, "to": req.receiver_id, "label": f"₹{req.amount}", "arrows": "to"})
 
                 # Fetch History (Fan-In)
-                q = text(f"SELECT customer_id FROM transactions WHERE beneficiary_account = 'ACC_{req.receiver_id}' GROUP BY customer_id LIMIT 12")
-                history = conn.execute(q).fetchall()
+                history = Q_FAN_IN_SOURCES.execute(conn, {"beneficiary_account": f"ACC_{req.receiver_id}"}).fetchall()
                 
                 fan_in = len(history)
                 
@@ -253,15 +661,7 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
 
                 # Check for the Loop (B -> C -> A)
                 # We specifically look if B paid someone (C) who paid A
-                q_trace = text(f"""
-                    SELECT t1.beneficiary_account as b_to_c, t2.beneficiary_account as c_to_a 
-                    FROM transactions t1
-                    JOIN transactions t2 ON t1.beneficiary_account = CONCAT('ACC_', t2.customer_id)
-                    WHERE t1.customer_id = {req.receiver_id} 
-                    AND t2.beneficiary_account = 'ACC_{req.sender_id}'
-                    LIMIT 1
-                """)
-                trace = conn.execute(q_trace).fetchone()
+                trace = Q_CYCLE_TRACE.execute(conn, {"receiver_id": req.receiver_id, "sender_account": f"ACC_{req.sender_id}"}).fetchone()
 
                 if trace:
                     # Parse ID of 'C' from 'ACC_8003'
@@ -285,13 +685,11 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
             # ----------------------------------
             elif req.scenario_type == "device":
                 # 1. Find Device ID of Sender
-                q_dev = text(f"SELECT device_id FROM transactions WHERE customer_id = {req.sender_id} LIMIT 1")
-                res = conn.execute(q_dev).fetchone()
+                res = Q_SENDER_DEVICE.execute(conn, {"customer_id": req.sender_id}).fetchone()
                 dev_id = res[0] if res else "Unknown_Device"
 
                 # 2. Count Users on this Device
-                q_farm = text(f"SELECT DISTINCT customer_id FROM transactions WHERE device_id = '{dev_id}' LIMIT 15")
-                farm_users = [r[0] for r in conn.execute(q_farm).fetchall()]
+                farm_users = [r[0] for r in Q_DEVICE_CUSTOMERS.execute(conn, {"device_id": dev_id}).fetchall()]
                 
                 # Nodes
                 # Center Node is DEVICE (Square)
@@ -320,9 +718,8 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
             if status == "BLOCKED": is_fraud = 1 
             else: is_fraud = 0
             
-            conn.execute(text("INSERT INTO transactions (customer_id, amount, timestamp, device_id, beneficiary_account, customer_account_number, city, is_fraud, fraud_type) VALUES (:c, :a, :t, :d, :b, :acc, 'Mumbai', :f, :ft)"),
-            {"c": req.sender_id, "a": req.amount, "t": datetime.now(), "d": "DEMO_DEV", "b": f"ACC_{req.receiver_id}", "acc": f"ACC_{req.sender_id}", "f": is_fraud, "ft": f"GNN_{req.scenario_type.upper()}"})
-            conn.commit()
+            log_transactions([{"customer_id": req.sender_id, "amount": req.amount, "timestamp": datetime.now(), "device_id": "DEMO_DEV", "beneficiary_account": f"ACC_{req.receiver_id}",
+                               "customer_account_number": f"ACC_{req.sender_id}", "city": "Mumbai", "is_fraud": is_fraud, "fraud_type": f"GNN_{req.scenario_type.upper()}"}])
 
         return {"status": status, "message": msg, "verdict_color": color, "graph_data": {"nodes": nodes, "edges": edges}}
 
@@ -335,20 +732,30 @@ def analyze_gnn_transaction(req: GNNTransactionRequest):
 #   (Connected to Random Forest Model)
 # ==========================================
 
+Q_TOP_BENEFICIARIES = register("top_beneficiaries", """
+    SELECT beneficiary_account, CAST(AVG(amount) AS INT) as avg_spend 
+    FROM transactions 
+    WHERE customer_id = :customer_id 
+    GROUP BY beneficiary_account 
+    ORDER BY COUNT(*) DESC LIMIT 3
+""")
+Q_USUAL_CONTEXT = register("usual_context", """
+    SELECT device_id, city, 
+    mode() WITHIN GROUP (ORDER BY EXTRACT(HOUR FROM timestamp)) as usual_hour
+    FROM transactions 
+    WHERE customer_id = :customer_id
+    GROUP BY device_id, city
+    ORDER BY COUNT(*) DESC LIMIT 1
+""")
+Q_AVG_AMOUNT = register("avg_amount", "SELECT AVG(amount) FROM transactions WHERE customer_id = :customer_id")
+
 # 6.1 GET CUSTOMER DETAILS (Includes Avg Spend)
 @app.post("/get_customer_details")
 def get_customer_details(req: CustomerDetailRequest):
     try:
         with engine.connect() as conn:
             # Beneficiary Query with Average Spend
-            ben_q = text(f"""
-                SELECT beneficiary_account, CAST(AVG(amount) AS INT) as avg_spend 
-                FROM transactions 
-                WHERE customer_id = {req.customer_id} 
-                GROUP BY beneficiary_account 
-                ORDER BY COUNT(*) DESC LIMIT 3
-            """)
-            ben_data = conn.execute(ben_q).fetchall()
+            ben_data = Q_TOP_BENEFICIARIES.execute(conn, {"customer_id": req.customer_id}).fetchall()
             
             beneficiaries = []
             if ben_data:
@@ -356,15 +763,7 @@ def get_customer_details(req: CustomerDetailRequest):
                     beneficiaries.append({"account": r[0], "avg_spend": r[1]})
             
             # Usual Context
-            ctx_q = text(f"""
-                SELECT device_id, city, 
-                mode() WITHIN GROUP (ORDER BY EXTRACT(HOUR FROM timestamp)) as usual_hour
-                FROM transactions 
-                WHERE customer_id = {req.customer_id}
-                GROUP BY device_id, city
-                ORDER BY COUNT(*) DESC LIMIT 1
-            """)
-            ctx = conn.execute(ctx_q).fetchone()
+            ctx = Q_USUAL_CONTEXT.execute(conn, {"customer_id": req.customer_id}).fetchone()
             
             return {
                 "status": "success",
@@ -406,9 +805,8 @@ def analyze_pattern_transaction(req: PatternRequest):
             
             else:
                 # B. AMOUNT SPIKE CHECK
-                avg_q = text(f"SELECT AVG(amount) FROM transactions WHERE customer_id={req.customer_id}")
                 with engine.connect() as conn:
-                    avg_val = conn.execute(avg_q).fetchone()[0] or 0
+                    avg_val = Q_AVG_AMOUNT.execute(conn, {"customer_id": req.customer_id}).fetchone()[0] or 0
                 
                 if avg_val > 0 and req.amount > (avg_val * 2):
                     rf_score += 0.55
@@ -458,19 +856,13 @@ def analyze_pattern_transaction(req: PatternRequest):
         db_reason = msg if is_fraud else "None"
         if len(db_reason) > 50: db_reason = db_reason[:47] + "..."
 
-        with engine.begin() as conn:
-            res = conn.execute(text(f"SELECT customer_name FROM customers WHERE customer_id = {req.customer_id}")).fetchone()
-            c_name = res[0] if res else f"User {req.customer_id}"
+        c_name = customer_cache.name_or_default(req.customer_id)
             
-            conn.execute(text("""
-                INSERT INTO transactions 
-                (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, customer_account_number, city, payment_method_detail, is_fraud, fraud_type)
-                VALUES (:c, :cn, :a, :t, :d, :b, :acc, :city, 'Pattern Check', :f, :ft)
-            """), {
-                "c": req.customer_id, "cn": c_name, "a": req.amount, "t": timestamp, "d": req.device_id,
-                "b": req.beneficiary_account, "acc": f"ACC_{req.customer_id}", "city": req.city,
-                "f": is_fraud, "ft": db_reason
-            })
+        log_transactions([{
+            "customer_id": req.customer_id, "customer_name": c_name, "amount": req.amount, "timestamp": timestamp, "device_id": req.device_id,
+            "beneficiary_account": req.beneficiary_account, "customer_account_number": f"ACC_{req.customer_id}", "city": req.city,
+            "payment_method_detail": "Pattern Check", "is_fraud": is_fraud, "fraud_type": db_reason
+        }])
 
         return {
             "status": status, 
@@ -488,7 +880,7 @@ def analyze_pattern_transaction(req: PatternRequest):
 # ==========================================
 
 class AnomalyRequest(BaseModel):
-    vendor_name: str
+    vendor_name: str = Field(..., max_length=TEXT_MAX)
     amount: float
 
 @app.post("/analyze_anomaly_transaction")
@@ -536,16 +928,12 @@ def analyze_anomaly_transaction(req: AnomalyRequest):
 
         # 4. SAVE TO DB
         timestamp = get_ist_time()
-        with engine.begin() as conn:
-            conn.execute(text("""
-                INSERT INTO transactions 
-                (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, city, payment_method_detail, is_fraud, fraud_type)
-                VALUES (8821, 'Rohan Das', :a, :t, 'Auditor_PC', :b, 'Mumbai', 'Vendor Audit', :f, :ft)
-            """), {
-                "a": req.amount, "t": timestamp, "b": req.vendor_name, 
-                "f": 1 if status == "BLOCKED" else 0, 
-                "ft": verdict if status == "BLOCKED" else "None"
-            })
+        log_transactions([{
+            "customer_id": 8821, "customer_name": "Rohan Das", "amount": req.amount, "timestamp": timestamp,
+            "device_id": "Auditor_PC", "beneficiary_account": req.vendor_name, "city": "Mumbai", "payment_method_detail": "Vendor Audit",
+            "is_fraud": 1 if status == "BLOCKED" else 0, 
+            "fraud_type": verdict if status == "BLOCKED" else "None"
+        }])
 
         return {
             "status": status,
@@ -564,20 +952,30 @@ def analyze_anomaly_transaction(req: AnomalyRequest):
 #   SECTION 8: SCENARIO PROFILING (Feature Store)
 # ==========================================
 
+Q_PROFILE_TIMELINE = register("profile_timeline", """
+    SELECT 
+        grand_total, active_days, 
+        global_daily_avg, global_weekly_avg, 
+        global_monthly_avg, global_yearly_avg
+    FROM profile_timeline 
+    WHERE customer_id = :customer_id
+""")
+Q_PROFILE_BENEFICIARIES = register("profile_beneficiaries", """
+    SELECT 
+        beneficiary_account, total_amount, txn_count, 
+        active_days, daily_avg, weekly_avg, 
+        monthly_avg, yearly_avg
+    FROM profile_beneficiary 
+    WHERE customer_id = :customer_id
+    ORDER BY total_amount DESC
+""")
+
 @app.post("/get_profile_timeline")
 def get_profile_timeline(req: CustomerDetailRequest):
     try:
         with engine.connect() as conn:
             # Query matches image_da5b64.png exactly
-            query = text(f"""
-                SELECT 
-                    grand_total, active_days, 
-                    global_daily_avg, global_weekly_avg, 
-                    global_monthly_avg, global_yearly_avg
-                FROM profile_timeline 
-                WHERE customer_id = {req.customer_id}
-            """)
-            row = conn.execute(query).fetchone()
+            row = Q_PROFILE_TIMELINE.execute(conn, {"customer_id": req.customer_id}).fetchone()
             
             if not row:
                 return {"status": "empty", "timeline": []}
@@ -602,16 +1000,7 @@ def get_profile_beneficiary(req: CustomerDetailRequest):
     try:
         with engine.connect() as conn:
             # Query matches image_da5ba5.png exactly
-            query = text(f"""
-                SELECT 
-                    beneficiary_account, total_amount, txn_count, 
-                    active_days, daily_avg, weekly_avg, 
-                    monthly_avg, yearly_avg
-                FROM profile_beneficiary 
-                WHERE customer_id = {req.customer_id}
-                ORDER BY total_amount DESC
-            """)
-            result = conn.execute(query).fetchall()
+            result = Q_PROFILE_BENEFICIARIES.execute(conn, {"customer_id": req.customer_id}).fetchall()
             
             data = []
             for row in result:
@@ -638,71 +1027,100 @@ def get_profile_beneficiary(req: CustomerDetailRequest):
 #   SECTION 9: VOLUME SIMULATOR (2x Rule)
 # ==========================================
 
+# Simulator period -> (its rolling window, the longer window its average is taken over).
+# Yearly has no longer window, so it keeps the lifetime average from profile_*.
+VOLUME_PERIODS = {"Daily": ("1d", "7d"), "Weekly": ("7d", "30d"), "Monthly": ("30d", "365d")}
+WINDOW_DAYS = {"1d": 1, "7d": 7, "30d": 30, "365d": 365}
+
+Q_TIMELINE_AVGS = register("timeline_avgs", """
+    SELECT global_daily_avg, global_weekly_avg, global_monthly_avg, global_yearly_avg
+    FROM profile_timeline WHERE customer_id = :customer_id
+""")
+Q_BENEFICIARY_AVGS = register("beneficiary_avgs", """
+    SELECT daily_avg, weekly_avg, monthly_avg, yearly_avg
+    FROM profile_beneficiary WHERE customer_id = :customer_id AND beneficiary_account = :beneficiary_account
+""")
+
+def volume_baseline(period, customer_id, beneficiary_account=None):
+    """
+    -> (average volume per `period`, volume in the current `period` window), or None without history.
+    Rolling profiles: the average of the trailing window minus the current one, over the days of it
+    the key was actually active (e.g. Daily = prior 6 days' volume / their active days), an O(1)
+    lookup. Yearly, and everything until the profiles are warm: the lifetime averages in profile_*
+    (window volume None).
+    """
+    if rolling_profiles.is_warm and period in VOLUME_PERIODS:
+        if beneficiary_account is None:
+            windows = rolling_profiles.customer(customer_id)
+        else:
+            windows = rolling_profiles.beneficiary(customer_id, beneficiary_account)
+        if windows is None:
+            return None
+        current, trailing = VOLUME_PERIODS[period]
+        # The amount being checked falls in the current window: keep it out of its own baseline
+        prior_days = windows[trailing]["active_days"] - WINDOW_DAYS[current]
+        if prior_days <= 0:
+            return 0.0, windows[current]["sum"]
+        prior_volume = windows[trailing]["sum"] - windows[current]["sum"]
+        return prior_volume / prior_days * WINDOW_DAYS[current], windows[current]["sum"]
+
+    with engine.connect() as conn:
+        if beneficiary_account is None:
+            row = Q_TIMELINE_AVGS.execute(conn, {"customer_id": customer_id}).fetchone()
+        else:
+            row = Q_BENEFICIARY_AVGS.execute(conn, {"customer_id": customer_id, "beneficiary_account": beneficiary_account}).fetchone()
+    if not row:
+        return None
+    avg_map = {"Daily": row[0], "Weekly": row[1], "Monthly": row[2], "Yearly": row[3]}
+    # Handle None/Null values in DB
+    return float(avg_map.get(period, 0) or 0), None
+
 class VolumeRequest(BaseModel):
     customer_id: int
     amount: float
-    period: str # "Daily", "Weekly", "Monthly", "Yearly"
+    period: str = Field(..., max_length=LABEL_MAX) # "Daily", "Weekly", "Monthly", "Yearly"
 
 @app.post("/simulate_volume_check")
 def simulate_volume_check(req: VolumeRequest):
     try:
-        with engine.connect() as conn:
-            # 1. Fetch the user's specific averages
-            query = text(f"""
-                SELECT global_daily_avg, global_weekly_avg, global_monthly_avg, global_yearly_avg
-                FROM profile_timeline 
-                WHERE customer_id = {req.customer_id}
-            """)
-            row = conn.execute(query).fetchone()
-            
-            if not row:
-                return {"status": "error", "message": "Profile not found. Run data pipeline first."}
-
-            # 2. Select the correct average based on dropdown
-            avg_map = {
-                "Daily": row[0],
-                "Weekly": row[1],
-                "Monthly": row[2],
-                "Yearly": row[3]
-            }
-            # Handle None/Null values in DB
-            limit = float(avg_map.get(req.period, 0) or 0)
-            
-            # Default fallback if history is 0 (to avoid blocking everything)
-            if limit == 0: limit = 1000 
+        # 1-2. The user's average for the period picked in the dropdown
+        baseline = volume_baseline(req.period, req.customer_id)
+        if baseline is None:
+            return {"status": "error", "message": "Profile not found. Run data pipeline first."}
+        limit, window_volume = baseline
 
-            # 3. THE RULE: Block if > 2x Average
-            threshold = limit * 2
-            
-            if req.amount > threshold:
-                status = "BLOCKED"
-                msg = f"Volume Breach! ₹{req.amount:,.0f} > 2x {req.period} Avg (₹{limit:,.0f})"
-                is_fraud = 1
-            else:
-                status = "APPROVED"
-                msg = f"Safe. Amount within limit (Limit: ₹{threshold:,.0f})"
-                is_fraud = 0
+        # Default fallback if history is 0 (to avoid blocking everything)
+        if limit == 0: limit = 1000 
 
-            # 4. Save Transaction to DB
-            timestamp = get_ist_time()
-            res = conn.execute(text(f"SELECT customer_name FROM customers WHERE customer_id = {req.customer_id}")).fetchone()
-            c_name = res[0] if res else f"User {req.customer_id}"
-            
-            conn.execute(text("""
-                INSERT INTO transactions 
-                (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, city, payment_method_detail, is_fraud, fraud_type)
-                VALUES (:c, :cn, :a, :t, 'Sim_Device', 'VOLUME_TEST', 'Mumbai', 'Volume Check', :f, :ft)
-            """), {
-                "c": req.customer_id, "cn": c_name, "a": req.amount, "t": timestamp, 
-                "f": is_fraud, "ft": f"{req.period} Volume Spike" if is_fraud else "None"
-            })
+        # 3. THE RULE: Block if > 2x Average
+        threshold = limit * 2
+        
+        if req.amount > threshold:
+            status = "BLOCKED"
+            msg = f"Volume Breach! ₹{req.amount:,.0f} > 2x {req.period} Avg (₹{limit:,.0f})"
+            is_fraud = 1
+        else:
+            status = "APPROVED"
+            msg = f"Safe. Amount within limit (Limit: ₹{threshold:,.0f})"
+            is_fraud = 0
 
-            return {
-                "status": status, 
-                "message": msg, 
-                "threshold": threshold,
-                "avg_used": limit
-            }
+        # 4. Save Transaction to DB
+        timestamp = get_ist_time()
+        c_name = customer_cache.name_or_default(req.customer_id)
+        
+        log_transactions([{
+            "customer_id": req.customer_id, "customer_name": c_name, "amount": req.amount, "timestamp": timestamp, 
+            "device_id": "Sim_Device", "beneficiary_account": "VOLUME_TEST", "city": "Mumbai", "payment_method_detail": "Volume Check",
+            "is_fraud": is_fraud, "fraud_type": f"{req.period} Volume Spike" if is_fraud else "None"
+        }])
+
+        return {
+            "status": status, 
+            "message": msg, 
+            "threshold": threshold,
+            "avg_used": limit,
+            "window_volume": window_volume
+        }
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -714,70 +1132,50 @@ def simulate_volume_check(req: VolumeRequest):
 
 class BeneficiaryVolumeRequest(BaseModel):
     customer_id: int
-    beneficiary_account: str
+    beneficiary_account: str = Field(..., max_length=TEXT_MAX)
     amount: float
-    period: str # "Daily", "Weekly", "Monthly", "Yearly"
+    period: str = Field(..., max_length=LABEL_MAX) # "Daily", "Weekly", "Monthly", "Yearly"
 
 @app.post("/simulate_beneficiary_volume_check")
 def simulate_beneficiary_volume_check(req: BeneficiaryVolumeRequest):
     try:
-        with engine.connect() as conn:
-            # 1. Fetch specific relationship stats
-            query = text(f"""
-                SELECT daily_avg, weekly_avg, monthly_avg, yearly_avg
-                FROM profile_beneficiary 
-                WHERE customer_id = {req.customer_id} 
-                AND beneficiary_account = '{req.beneficiary_account}'
-            """)
-            row = conn.execute(query).fetchone()
-            
-            if not row:
-                return {"status": "error", "message": "No history for this beneficiary."}
-
-            # 2. Select Average
-            avg_map = {
-                "Daily": row[0],
-                "Weekly": row[1],
-                "Monthly": row[2],
-                "Yearly": row[3]
-            }
-            limit = float(avg_map.get(req.period, 0) or 0)
-            
-            # Default safe limit if history is 0
-            if limit == 0: limit = 5000 
+        # 1-2. Average for this specific relationship and period
+        baseline = volume_baseline(req.period, req.customer_id, req.beneficiary_account)
+        if baseline is None:
+            return {"status": "error", "message": "No history for this beneficiary."}
+        limit, window_volume = baseline
+        
+        # Default safe limit if history is 0
+        if limit == 0: limit = 5000 
 
-            # 3. Apply 2x Rule
-            threshold = limit * 2
-            
-            if req.amount > threshold:
-                status = "BLOCKED"
-                msg = f"Relationship Breach! ₹{req.amount:,.0f} > 2x {req.period} Avg to {req.beneficiary_account} (Limit: ₹{threshold:,.0f})"
-                is_fraud = 1
-            else:
-                status = "APPROVED"
-                msg = f"Safe. Amount fits normal relationship pattern."
-                is_fraud = 0
+        # 3. Apply 2x Rule
+        threshold = limit * 2
+        
+        if req.amount > threshold:
+            status = "BLOCKED"
+            msg = f"Relationship Breach! ₹{req.amount:,.0f} > 2x {req.period} Avg to {req.beneficiary_account} (Limit: ₹{threshold:,.0f})"
+            is_fraud = 1
+        else:
+            status = "APPROVED"
+            msg = f"Safe. Amount fits normal relationship pattern."
+            is_fraud = 0
 
-            # 4. Save to DB
-            timestamp = get_ist_time()
-            res = conn.execute(text(f"SELECT customer_name FROM customers WHERE customer_id = {req.customer_id}")).fetchone()
-            c_name = res[0] if res else f"User {req.customer_id}"
-            
-            conn.execute(text("""
-                INSERT INTO transactions 
-                (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, city, payment_method_detail, is_fraud, fraud_type)
-                VALUES (:c, :cn, :a, :t, 'Sim_Device', :b, 'Mumbai', 'Beneficiary Check', :f, :ft)
-            """), {
-                "c": req.customer_id, "cn": c_name, "a": req.amount, "t": timestamp, 
-                "b": req.beneficiary_account, "f": is_fraud, 
-                "ft": f"Relationship Spike ({req.period})" if is_fraud else "None"
-            })
+        # 4. Save to DB
+        timestamp = get_ist_time()
+        c_name = customer_cache.name_or_default(req.customer_id)
+        
+        log_transactions([{
+            "customer_id": req.customer_id, "customer_name": c_name, "amount": req.amount, "timestamp": timestamp, 
+            "device_id": "Sim_Device", "beneficiary_account": req.beneficiary_account, "city": "Mumbai", "payment_method_detail": "Beneficiary Check",
+            "is_fraud": is_fraud, "fraud_type": f"Relationship Spike ({req.period})" if is_fraud else "None"
+        }])
 
-            return {
-                "status": status, 
-                "message": msg, 
-                "threshold": threshold
-            }
+        return {
+            "status": status, 
+            "message": msg, 
+            "threshold": threshold,
+            "window_volume": window_volume
+        }
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -788,71 +1186,120 @@ def simulate_beneficiary_volume_check(req: BeneficiaryVolumeRequest):
 
 class BenSimRequest(BaseModel):
     customer_id: int
-    beneficiary_account: str
+    beneficiary_account: str = Field(..., max_length=TEXT_MAX)
     amount: float
-    period: str # "Daily", "Weekly", "Monthly", "Yearly"
+    period: str = Field(..., max_length=LABEL_MAX) # "Daily", "Weekly", "Monthly", "Yearly"
 
 @app.post("/simulate_beneficiary_volume_check")
 def simulate_beneficiary_volume_check(req: BenSimRequest):
     try:
-        with engine.connect() as conn:
-            # 1. Fetch specific relationship stats for this pair
-            query = text(f"""
-                SELECT daily_avg, weekly_avg, monthly_avg, yearly_avg
-                FROM profile_beneficiary 
-                WHERE customer_id = {req.customer_id} 
-                AND beneficiary_account = '{req.beneficiary_account}'
-            """)
-            row = conn.execute(query).fetchone()
-            
-            if not row:
-                return {"status": "error", "message": "Relationship history not found."}
-
-            # 2. Select the relevant average based on input period
-            avg_map = {
-                "Daily": row[0],
-                "Weekly": row[1],
-                "Monthly": row[2],
-                "Yearly": row[3]
-            }
-            # Handle potential None values from DB
-            limit = float(avg_map.get(req.period, 0) or 0)
-            
-            # If no history exists for that specific period, set a low default safety limit
-            if limit == 0: limit = 1000 
+        # 1-2. Average for this pair and the input period
+        baseline = volume_baseline(req.period, req.customer_id, req.beneficiary_account)
+        if baseline is None:
+            return {"status": "error", "message": "Relationship history not found."}
+        limit, window_volume = baseline
+        
+        # If no history exists for that specific period, set a low default safety limit
+        if limit == 0: limit = 1000 
 
-            # 3. APPLY THE 2.5x RULE
-            threshold = limit * 2.5
-            
-            if req.amount > threshold:
-                status = "BLOCKED"
-                msg = f"Relationship Breach! ₹{req.amount:,.0f} exceeds 2.5x {req.period} average to {req.beneficiary_account}. (Limit: ₹{threshold:,.0f})"
-                is_fraud = 1
-            else:
-                status = "APPROVED"
-                msg = f"Safe. Amount is within 2.5x relationship limits."
-                is_fraud = 0
+        # 3. APPLY THE 2.5x RULE
+        threshold = limit * 2.5
+        
+        if req.amount > threshold:
+            status = "BLOCKED"
+            msg = f"Relationship Breach! ₹{req.amount:,.0f} exceeds 2.5x {req.period} average to {req.beneficiary_account}. (Limit: ₹{threshold:,.0f})"
+            is_fraud = 1
+        else:
+            status = "APPROVED"
+            msg = f"Safe. Amount is within 2.5x relationship limits."
+            is_fraud = 0
 
-            # 4. Save Transaction to DB for logging
-            timestamp = get_ist_time()
-            res = conn.execute(text(f"SELECT customer_name FROM customers WHERE customer_id = {req.customer_id}")).fetchone()
-            c_name = res[0] if res else f"User {req.customer_id}"
-            
-            conn.execute(text("""
-                INSERT INTO transactions 
-                (customer_id, customer_name, amount, timestamp, device_id, beneficiary_account, city, payment_method_detail, is_fraud, fraud_type)
-                VALUES (:c, :cn, :a, :t, 'Sim_Device', :b, 'Mumbai', 'Ben. Volume Check', :f, :ft)
-            """), {
-                "c": req.customer_id, "cn": c_name, "a": req.amount, "t": timestamp, 
-                "b": req.beneficiary_account, "f": is_fraud, 
-                "ft": f"Relationship Spike ({req.period})" if is_fraud else "None"
-            })
+        # 4. Save Transaction to DB for logging
+        timestamp = get_ist_time()
+        c_name = customer_cache.name_or_default(req.customer_id)
+        
+        log_transactions([{
+            "customer_id": req.customer_id, "customer_name": c_name, "amount": req.amount, "timestamp": timestamp, 
+            "device_id": "Sim_Device", "beneficiary_account": req.beneficiary_account, "city": "Mumbai", "payment_method_detail": "Ben. Volume Check",
+            "is_fraud": is_fraud, "fraud_type": f"Relationship Spike ({req.period})" if is_fraud else "None"
+        }])
 
-            return {
-                "status": status, 
-                "message": msg, 
-                "threshold": threshold
-            }
+        return {
+            "status": status, 
+            "message": msg, 
+            "threshold": threshold,
+            "window_volume": window_volume
+        }
 
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+# ==========================================
+#   SECTION 12: ONLINE FEATURE STORE (Debug)
+# ==========================================
+
+@app.get("/features/{customer_id}")
+def get_features(customer_id: int):
+    if not feature_store.is_warm:
+        return {"status": "cold", "message": "Feature Store not warmed. Live features are served from SQL."}
+    return {"status": "success", "features": feature_store.snapshot(customer_id)}
+
+@app.get("/profiles/rolling/{customer_id}")
+def get_rolling_profile(customer_id: int, beneficiary_account: str = None):
+    """1d/7d/30d/365d count, sum, mean, max and stddev for a customer (or one of its beneficiaries)."""
+    if not rolling_profiles.is_warm:
+        return {"status": "cold", "message": "Rolling profiles not warmed."}
+    if beneficiary_account is None:
+        windows = rolling_profiles.customer(customer_id)
+    else:
+        windows = rolling_profiles.beneficiary(customer_id, beneficiary_account)
+    if windows is None:
+        return {"status": "empty", "windows": {}}
+    return {"status": "success", "windows": windows}
+
+@app.get("/metrics/pool")
+def get_pool_metrics():
+    """Connection pool occupancy and checkout wait times, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW."""
+    return {"pools": get_all_pool_stats()}
+
+@app.get("/metrics/queries")
+def get_query_metrics():
+    """Latency histogram per registered statement (calls, errors, mean/max, p50/p99 bucket bounds)."""
+    return {"prepared": query_registry.prepare, "statements": query_registry.stats()}
+
+@app.get("/metrics/txn_logger")
+def get_txn_logger_metrics():
+    """Write-behind logger health: queue depth, rows written/spilled/replayed, last flush error."""
+    return transaction_logger.stats()
+
+@app.get("/metrics/customer_cache")
+def get_customer_cache_metrics():
+    """Customer name cache: entries, hit/miss counters, current table epoch."""
+    return customer_cache.stats()
+
+@app.get("/metrics/profile_updater")
+def get_profile_updater_metrics():
+    """Incremental profile maintenance: rows pending/flushed, view refreshes, last error."""
+    return profile_updater.stats()
+
+@app.get("/metrics/rollups")
+def get_rollup_metrics():
+    """Dashboard rollup maintenance: rows recorded/flushed, pending buckets, last error."""
+    return rollup_updater.stats()
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once both ML judges are loaded and every cache is warm, 503 until then."""
+    checks = {
+        "pattern_model": pattern_engine.loaded and pattern_engine.model_loaded,
+        "anomaly_model": anomaly_engine.loaded and anomaly_engine.model_loaded,
+        "feature_store": feature_store.is_warm,
+        "graph_index": graph_index.is_warm,
+        "customer_cache": customer_cache.is_warm,
+        "profile_updater": profile_updater.is_warm,
+        "rolling_profiles": rolling_profiles.is_warm,
+        "rollup_updater": rollup_updater.is_warm,
+        "schema": schema_ready,
+    }
+    is_ready = all(checks.values())
+    return JSONResponse({"ready": is_ready, "checks": checks}, status_code=200 if is_ready else 503)
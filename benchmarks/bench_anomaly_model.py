@@ -0,0 +1,51 @@
+"""
+Anomaly judge latency: sklearn Pipeline.decision_function vs the compiled isolation trees.
+Run from the repo root:  python benchmarks/bench_anomaly_model.py [--calls 2000] [--batch 32]
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from judges.anomaly_model import AnomalyModel
+from judges.compiled_forest import CompiledIsolationForest
+from bench_pattern_model import FEATURES, sample_rows, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    model = AnomalyModel(compiled=False)
+    if not model.model_loaded:
+        sys.exit("iso_anomaly.pkl not found (run train_models.py first)")
+    compiled = CompiledIsolationForest.from_pipeline(model.pipeline)
+
+    X = sample_rows(20000)
+    expected = model.pipeline.decision_function(pd.DataFrame(X, columns=FEATURES))
+    diff = np.abs(compiled.decision_function(X) - expected).max()
+    print(f"max |compiled - decision_function| over {len(X)} rows: {diff:.2e}")
+
+    singles = [X[i:i + 1] for i in range(args.calls)]
+    batches = [X[i:i + args.batch] for i in range(0, args.calls * args.batch, args.batch)][:args.calls // 4]
+    fast = AnomalyModel(compiled=True)
+    shell = [[250000.0, 0.001, 1, 400]]
+
+    print(f"\n{'scorer':<28}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, fn, inputs in [
+        ("sklearn  single row", lambda x: model.pipeline.decision_function(pd.DataFrame(x, columns=FEATURES)), singles),
+        ("compiled single row", compiled.decision_function, singles),
+        (f"sklearn  batch of {args.batch}", lambda x: model.pipeline.decision_function(pd.DataFrame(x, columns=FEATURES)), batches),
+        (f"compiled batch of {args.batch}", compiled.decision_function, batches),
+        ("assess() shell rule", fast.assess, shell * args.calls),
+    ]:
+        p50, p99 = timed(fn, inputs)
+        print(f"{label:<28}{p50:>10.3f}{p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+API cold start: import time, time to listening, time to /ready, first-request latency.
+Compares lazy startup (default) with API_LAZY_MODELS=0 (models loaded at import).
+Run from the repo root:  python benchmarks/bench_api_startup.py [--runs 3]
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_TX = {"customer_id": 1003, "amount": 5000.0, "device_id": "bench_device",
+             "beneficiary_account": "ACC_1004", "account_age_days": 300}
+
+
+def import_seconds(env):
+    code = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def post_ms(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def serve_once(env, port, timeout):
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        listening = ready = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and ready is None:
+            status = get_status(base + "/ready")
+            if status is not None and listening is None:
+                listening = time.perf_counter() - start
+            if status == 200:
+                ready = time.perf_counter() - start
+            else:
+                time.sleep(0.02)
+        if ready is None:
+            return None
+        first = post_ms(base + "/analyze_transaction/", SAMPLE_TX)
+        warm = statistics.median(post_ms(base + "/analyze_transaction/", SAMPLE_TX) for _ in range(20))
+        return {"listening_s": listening, "ready_s": ready, "first_ms": first, "warm_ms": warm}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'import s':>10}{'listening s':>13}{'/ready s':>10}{'1st req ms':>12}{'warm req ms':>13}")
+    for mode, lazy in (("lazy", "1"), ("eager", "0")):
+        env = dict(os.environ, API_LAZY_MODELS=lazy)
+        imports, runs = [], []
+        for _ in range(args.runs):
+            imports.append(import_seconds(env))
+            r = serve_once(env, args.port, args.timeout)
+            if r:
+                runs.append(r)
+        if not runs:
+            print(f"{mode:<8}  server never became ready")
+            continue
+        med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        print(f"{mode:<8}{statistics.median(imports):>10.2f}{med['listening_s']:>13.2f}{med['ready_s']:>10.2f}"
+              f"{med['first_ms']:>12.1f}{med['warm_ms']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Pattern judge latency: sklearn Pipeline.predict_proba vs the compiled flat-array forest.
+Run from the repo root:  python benchmarks/bench_pattern_model.py [--calls 2000] [--batch 32]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from judges.pattern_model import PatternModel
+from judges.compiled_forest import CompiledForest
+
+FEATURES = ['amount', 'opex_ratio', 'users_on_device', 'account_age_days']
+
+
+def sample_rows(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.lognormal(8, 1.5, n),        # amount
+        rng.uniform(0, 0.5, n),          # opex_ratio
+        rng.integers(1, 15, n),          # users_on_device
+        rng.integers(0, 2000, n),        # account_age_days
+    ]).astype(float)
+
+
+def timed(fn, inputs):
+    samples = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    model = PatternModel(compiled=False)
+    if not model.model_loaded:
+        sys.exit("rf_pattern.pkl not found (run train_models.py first)")
+    compiled = CompiledForest.from_pipeline(model.pipeline)
+
+    # Correctness: compiled output vs predict_proba
+    X = sample_rows(20000)
+    expected = model.pipeline.predict_proba(pd.DataFrame(X, columns=FEATURES))
+    diff = np.abs(compiled.predict_proba(X) - expected).max()
+    print(f"max |compiled - predict_proba| over {len(X)} rows: {diff:.2e}")
+
+    singles = [X[i:i + 1] for i in range(args.calls)]
+    batches = [X[i:i + args.batch] for i in range(0, args.calls * args.batch, args.batch)][:args.calls // 4]
+
+    print(f"\n{'scorer':<28}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, fn, inputs in [
+        ("sklearn  single row", lambda x: model.pipeline.predict_proba(pd.DataFrame(x, columns=FEATURES)), singles),
+        ("compiled single row", compiled.predict_proba, singles),
+        (f"sklearn  batch of {args.batch}", lambda x: model.pipeline.predict_proba(pd.DataFrame(x, columns=FEATURES)), batches),
+        (f"compiled batch of {args.batch}", compiled.predict_proba, batches),
+    ]:
+        p50, p99 = timed(fn, inputs)
+        print(f"{label:<28}{p50:>10.3f}{p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
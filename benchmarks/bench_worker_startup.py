@@ -0,0 +1,118 @@
+"""
+Startup benchmark for the serving modes: cold start and per-worker memory.
+  prefork : python serve.py --workers N        (models loaded once, shared copy-on-write)
+  uvicorn : uvicorn api:app --workers N        (every worker loads its own models)
+Run from the repo root:  python benchmarks/bench_worker_startup.py [--workers 1 2 4] [--modes prefork uvicorn]
+
+RSS counts shared pages in every process; PSS splits them between the sharers, so the
+PSS total is the real footprint. USS is what each worker holds privately.
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_PATH = "/metrics/customer_cache"
+
+
+def descendants(pid):
+    found = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                for child in f.read().split():
+                    found.append(int(child))
+                    found.extend(descendants(int(child)))
+    except FileNotFoundError:
+        pass
+    return found
+
+
+def memory_kb(pid):
+    out = {"Rss": 0, "Pss": 0, "Private": 0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key] = int(rest.split()[0])
+            elif key in ("Private_Clean", "Private_Dirty"):
+                out["Private"] += int(rest.split()[0])
+    return out
+
+
+def command(mode, workers, port):
+    if mode == "prefork":
+        return [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)]
+    return [sys.executable, "-m", "uvicorn", "api:app", "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+
+
+def wait_ready(port, timeout):
+    url = f"http://127.0.0.1:{port}{PROBE_PATH}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def measure(mode, workers, port, timeout, settle):
+    start = time.perf_counter()
+    proc = subprocess.Popen(command(mode, workers, port), cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(port, timeout):
+            return None
+        cold_start = time.perf_counter() - start
+        time.sleep(settle)  # let the remaining workers finish their lifespan warm-up
+        for _ in range(workers * 4):
+            wait_ready(port, 1)
+
+        pids = [proc.pid] + descendants(proc.pid)
+        mem = {pid: memory_kb(pid) for pid in pids if os.path.exists(f"/proc/{pid}")}
+        worker_mem = [m for pid, m in mem.items() if pid != proc.pid and m["Rss"] > 50_000]
+        if not worker_mem:  # uvicorn with one worker serves from the main process
+            worker_mem = [mem[proc.pid]]
+        return {
+            "cold_start_s": cold_start,
+            "rss_total_mb": sum(m["Rss"] for m in mem.values()) / 1024,
+            "pss_total_mb": sum(m["Pss"] for m in mem.values()) / 1024,
+            "worker_rss_mb": sum(m["Rss"] for m in worker_mem) / max(len(worker_mem), 1) / 1024,
+            "worker_uss_mb": sum(m["Private"] for m in worker_mem) / max(len(worker_mem), 1) / 1024,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", default=["prefork", "uvicorn"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--settle", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'workers':>8}{'cold start s':>14}{'RSS total MB':>14}{'PSS total MB':>14}{'worker RSS MB':>15}{'worker USS MB':>15}")
+    for mode in args.modes:
+        for n in args.workers:
+            r = measure(mode, n, args.port, args.timeout, args.settle)
+            if r is None:
+                print(f"{mode:<10}{n:>8}  did not become ready")
+                continue
+            print(f"{mode:<10}{n:>8}{r['cold_start_s']:>14.2f}{r['rss_total_mb']:>14.1f}{r['pss_total_mb']:>14.1f}"
+                  f"{r['worker_rss_mb']:>15.1f}{r['worker_uss_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import text
+from customer_search import CustomerIndex
+
+Q_ALL_CUSTOMERS = text("SELECT customer_id, customer_name FROM customers ORDER BY customer_id ASC")
+Q_ONE_CUSTOMER = text("SELECT customer_name FROM customers WHERE customer_id = :customer_id")
+# Changes whenever generate_data.py drops and recreates the table (NULL if it doesn't exist)
+Q_CUSTOMERS_EPOCH = text("SELECT to_regclass('customers')::oid")
+
+_UNKNOWN = object()  # negative-cache marker
+
+
+class CustomerCache:
+    """
+    Process-local cache of the `customers` table (customer_id -> customer_name).
+      - warm(): one bulk SELECT at startup, also kept as the sorted roster behind /get_customers
+        and indexed for /customers/search (customer_search.CustomerIndex)
+      - LRU bounded by max_entries, every entry expires after `ttl` seconds
+      - negative caching: unknown IDs are remembered for `negative_ttl` seconds
+      - invalidation: a background check reads the table OID every `epoch_check_interval`
+        seconds; when generate_data.py resets the schema the OID changes and the cache reloads
+    """
+
+    def __init__(self, engine, max_entries=1_000_000, ttl=3600, negative_ttl=60, epoch_check_interval=30):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.epoch_check_interval = epoch_check_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # customer_id -> (name | _UNKNOWN, expires_at)
+        self.roster = None            # [(customer_id, customer_name)] sorted, None until warmed
+        self.index = None             # CustomerIndex over the roster
+        self.epoch = None
+        self.hits = 0
+        self.misses = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def from_env(cls, engine):
+        return cls(
+            engine,
+            max_entries=int(os.getenv("CUSTOMER_CACHE_MAX_ENTRIES", "1000000")),
+            ttl=float(os.getenv("CUSTOMER_CACHE_TTL", "3600")),
+            negative_ttl=float(os.getenv("CUSTOMER_CACHE_NEGATIVE_TTL", "60")),
+            epoch_check_interval=float(os.getenv("CUSTOMER_CACHE_CHECK_SECONDS", "30")),
+        )
+
+    def warm(self, engine=None):
+        engine = engine or self.engine
+        with engine.connect() as conn:
+            epoch = conn.execute(Q_CUSTOMERS_EPOCH).scalar()
+            roster = [(row[0], row[1]) for row in conn.execute(Q_ALL_CUSTOMERS)]
+        index = CustomerIndex(roster)
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries = OrderedDict((cid, (name, expires)) for cid, name in roster[-self.max_entries:])
+            self.roster = roster
+            self.index = index
+            self.epoch = epoch
+        print(f"✅ Customer Cache warmed: {len(roster)} customers")
+
+    @property
+    def is_warm(self):
+        return self.roster is not None
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.roster = None
+            self.index = None
+
+    # --- Lookups ---
+
+    def lookup(self, customer_id):
+        """Cache-only probe -> (hit, name). name is None for a cached 'unknown customer'."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(customer_id)
+            if entry is None or entry[1] < now:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(customer_id)
+            self.hits += 1
+            return True, (None if entry[0] is _UNKNOWN else entry[0])
+
+    def put(self, customer_id, name):
+        """Store a DB answer; name=None records a negative entry."""
+        ttl = self.ttl if name is not None else self.negative_ttl
+        with self.lock:
+            self.entries[customer_id] = (_UNKNOWN if name is None else name, time.monotonic() + ttl)
+            self.entries.move_to_end(customer_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_name(self, customer_id):
+        """Name from cache, or one DB lookup on a miss. None if the customer doesn't exist."""
+        hit, name = self.lookup(customer_id)
+        if hit:
+            return name
+        try:
+            with self.engine.connect() as conn:
+                res = conn.execute(Q_ONE_CUSTOMER, {"customer_id": customer_id}).fetchone()
+        except Exception:
+            return None  # DB trouble is not cached as "unknown"
+        name = res[0] if res else None
+        self.put(customer_id, name)
+        return name
+
+    def name_or_default(self, customer_id):
+        return self.get_name(customer_id) or f"User {customer_id}"
+
+    def all(self):
+        """Sorted [(customer_id, customer_name)] for the whole table (reloads after invalidation)."""
+        if self.roster is None:
+            self.warm()
+        return self.roster
+
+    def search(self, q, limit=20):
+        """[(customer_id, customer_name)] matching q by ID or name prefix / substring (see CustomerIndex)."""
+        index = self.index
+        if index is None:
+            self.warm()
+            index = self.index
+        return index.search(q, limit)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "roster": len(self.roster or ()), "hits": self.hits,
+                    "misses": self.misses, "epoch": self.epoch}
+
+    # --- Schema-reset detection ---
+
+    def start(self):
+        if self.thread is None:
+            # Each watcher gets its own Event, so one that outlives stop()'s join still exits
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self._watch_epoch, args=(self.stop_event,), name="customer-cache", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def check_epoch(self):
+        """Reload if `customers` was dropped/recreated since the last warm."""
+        with self.engine.connect() as conn:
+            epoch = conn.execute(Q_CUSTOMERS_EPOCH).scalar()
+        if epoch != self.epoch:
+            print("♻️ Customer Cache: customers table was reset, reloading.")
+            self.invalidate()
+            if epoch is not None:
+                self.warm()
+            else:
+                self.epoch = None
+
+    def _watch_epoch(self, stop_event):
+        while not stop_event.wait(self.epoch_check_interval):
+            try:
+                self.check_epoch()
+            except Exception as e:
+                print(f"⚠️ Customer Cache epoch check failed: {e}")
@@ -0,0 +1,90 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Shortest query that also runs the substring pass (shorter ones are prefix-only)
+SUBSTRING_MIN_CHARS = 3
+
+
+class CustomerIndex:
+    """
+    Immutable search index over (customer_id, customer_name), for the subject pickers.
+      - prefix: one sorted array of search keys (the customer ID, and the lowercased name from
+        each word start: "rahul the mule", "the mule", "mule"), each pointing at its customer.
+        bisect finds the first key >= q and every match follows it contiguously: O(log n + k).
+      - substring (queries of SUBSTRING_MIN_CHARS+, only when prefixes don't fill `limit`):
+        str.find over all names joined into one string, which scans at memchr speed and
+        stops as soon as `limit` customers are found.
+    Results: exact ID first, then prefix matches in key order, then substring matches.
+    """
+
+    def __init__(self, roster):
+        """roster: [(customer_id, customer_name)] sorted by customer_id."""
+        self.ids = [cid for cid, _ in roster]
+        self.names = [name for _, name in roster]
+        # Same normalization as the query (lowercase, whitespace runs -> one space)
+        lowered = [" ".join((name or "").lower().split()) for name in self.names]
+
+        keys, rows = [], []
+        for row, (cid, name) in enumerate(zip(self.ids, lowered)):
+            keys.append(str(cid))
+            rows.append(row)
+            start = 0
+            for word in name.split(" "):
+                if word:
+                    keys.append(name[start:])
+                    rows.append(row)
+                start += len(word) + 1
+        # Argsort on the keys alone (sorting (key, row) tuples is several times slower)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.rows = array('I', (rows[i] for i in order))
+
+        # "\n" never appears in a query, so a match can't span two names
+        self.haystack = "\n".join(lowered)
+        self.offsets = array('Q')
+        pos = 0
+        for name in lowered:
+            self.offsets.append(pos)
+            pos += len(name) + 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, q, limit=20):
+        """-> [(customer_id, customer_name)], at most `limit`. An empty query lists the first IDs."""
+        q = " ".join(str(q).lower().split())
+        if not q:
+            return [(self.ids[r], self.names[r]) for r in range(min(limit, len(self.ids)))]
+
+        found = []
+        seen = set()
+        def add(row):
+            if row not in seen:
+                seen.add(row)
+                found.append(row)
+            return len(found) >= limit
+
+        if q.isascii() and q.isdigit():
+            # IDs are sorted: bisect for the exact one
+            i = bisect_left(self.ids, int(q))
+            if i < len(self.ids) and self.ids[i] == int(q) and add(i):
+                return self._rows(found)
+
+        i = bisect_left(self.keys, q)
+        while i < len(self.keys) and self.keys[i].startswith(q):
+            if add(self.rows[i]):
+                return self._rows(found)
+            i += 1
+
+        if len(q) >= SUBSTRING_MIN_CHARS:
+            pos = self.haystack.find(q)
+            while pos != -1:
+                row = bisect_right(self.offsets, pos) - 1
+                if add(row):
+                    break
+                # Next name: one hit per customer is enough
+                pos = self.haystack.find(q, self.offsets[row + 1] if row + 1 < len(self.offsets) else len(self.haystack))
+        return self._rows(found)
+
+    def _rows(self, rows):
+        return [(self.ids[r], self.names[r]) for r in rows]
@@ -0,0 +1,100 @@
+"""
+Customer-scoped reads behind the Customer 360 page (Pages/4_Customers.py). Everything is keyed
+by one customer_id and pushed down with the Yearly/Quarterly/Monthly range as a half-open
+[start, end) on timestamp, so page memory depends on what is shown, not on the table size:
+  - the subject list comes from `customers`
+  - header KPIs, the daily trend and the beneficiary chart are aggregated in SQL
+  - the ledger is read one page at a time with keyset pagination on (timestamp, transaction_id)
+
+    summary = customer_summary(engine, 9001, *period_bounds('Yearly', 2025))
+    rows, cursor = ledger_page(engine, 9001, start, end)            # newest page
+    older, cursor = ledger_page(engine, 9001, start, end, cursor)   # the one after it
+"""
+import os
+from query_registry import register
+from fraud_types import fraud_name
+
+LEDGER_PAGE_SIZE = int(os.getenv("LEDGER_PAGE_SIZE", "50"))
+BENEFICIARY_LIMIT = 10
+
+_WHERE = "customer_id = :customer_id AND timestamp >= :start AND timestamp < :end"
+
+Q_SUBJECTS = register("customer_subjects", "SELECT customer_id, customer_name FROM customers ORDER BY customer_id")
+Q_YEARS = register("customer_years", """
+    SELECT DISTINCT CAST(EXTRACT(YEAR FROM timestamp) AS INT) AS year
+    FROM transactions WHERE customer_id = :customer_id AND timestamp IS NOT NULL
+    ORDER BY year DESC
+""")
+Q_SUMMARY = register("customer_summary", f"""
+    SELECT COUNT(*) AS txns, COALESCE(SUM(amount), 0) AS volume, COUNT(*) FILTER (WHERE is_fraud = 1) AS alerts,
+           (SELECT city FROM transactions WHERE {_WHERE} ORDER BY timestamp, transaction_id LIMIT 1) AS city
+    FROM transactions WHERE {_WHERE}
+""")
+Q_FRAUD_CODES = register("customer_fraud_codes", f"""
+    SELECT fraud_code, COUNT(*) AS count FROM transactions
+    WHERE is_fraud = 1 AND {_WHERE}
+    GROUP BY fraud_code ORDER BY count DESC, fraud_code
+""")
+Q_DAILY = register("customer_daily", f"""
+    SELECT to_char(timestamp, 'YYYY-MM-DD') AS date, SUM(amount) AS amount
+    FROM transactions WHERE {_WHERE}
+    GROUP BY 1 ORDER BY 1
+""")
+Q_BENEFICIARIES = register("customer_beneficiaries", f"""
+    SELECT beneficiary_account, SUM(amount) AS amount
+    FROM transactions WHERE {_WHERE} AND beneficiary_account IS NOT NULL
+    GROUP BY 1 ORDER BY 1 LIMIT :limit
+""")
+# Newest first; the next page starts strictly after the last (timestamp, transaction_id) shown
+Q_LEDGER_FIRST = register("customer_ledger_first", f"""
+    SELECT * FROM transactions WHERE {_WHERE}
+    ORDER BY timestamp DESC, transaction_id DESC LIMIT :limit
+""")
+Q_LEDGER_NEXT = register("customer_ledger_next", f"""
+    SELECT * FROM transactions WHERE {_WHERE} AND (timestamp, transaction_id) < (:cursor_ts, :cursor_id)
+    ORDER BY timestamp DESC, transaction_id DESC LIMIT :limit
+""")
+
+
+def list_subjects(engine):
+    """All customers as a (customer_id, customer_name) DataFrame."""
+    return Q_SUBJECTS.frame(engine)
+
+
+def customer_years(engine, customer_id):
+    with engine.connect() as conn:
+        return [row[0] for row in Q_YEARS.execute(conn, {"customer_id": customer_id})]
+
+
+def customer_summary(engine, customer_id, start, end):
+    """Header KPIs for one customer and period: txns, volume, alerts, city (of the first txn), reason."""
+    where = {"customer_id": customer_id, "start": start, "end": end}
+    with engine.connect() as conn:
+        summary = dict(Q_SUMMARY.execute(conn, where).mappings().one())
+        top = Q_FRAUD_CODES.execute(conn, where).first()
+    return {"txns": int(summary["txns"]), "volume": float(summary["volume"]), "alerts": int(summary["alerts"]),
+            "city": summary["city"], "reason": fraud_name(top.fraud_code) if top else None}
+
+
+def daily_spend(engine, customer_id, start, end):
+    return Q_DAILY.frame(engine, {"customer_id": customer_id, "start": start, "end": end})
+
+
+def beneficiary_totals(engine, customer_id, start, end, limit=BENEFICIARY_LIMIT):
+    return Q_BENEFICIARIES.frame(engine, {"customer_id": customer_id, "start": start, "end": end, "limit": limit})
+
+
+def ledger_page(engine, customer_id, start, end, cursor=None, limit=LEDGER_PAGE_SIZE):
+    """
+    One ledger page, newest first -> (DataFrame, cursor). Pass the returned cursor to get the
+    next (older) page; it is None once the last page has been read.
+    """
+    params = {"customer_id": customer_id, "start": start, "end": end, "limit": limit}
+    if cursor is None:
+        page = Q_LEDGER_FIRST.frame(engine, params)
+    else:
+        page = Q_LEDGER_NEXT.frame(engine, {**params, "cursor_ts": cursor[0], "cursor_id": cursor[1]})
+    if len(page) < limit:
+        return page, None
+    last = page.iloc[-1]
+    return page, (last['timestamp'].to_pydatetime(), int(last['transaction_id']))
@@ -1,23 +1,118 @@
 import os
+import time
+import threading
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 # Load the variables from .env
 load_dotenv()
 
-def get_engine():
-    """Returns a SQLAlchemy engine using variables from .env"""
-    user = os.getenv("DB_USER")
-    password = os.getenv("DB_PASS")
-    host = os.getenv("DB_HOST")
-    port = os.getenv("DB_PORT")
-    db_name = os.getenv("DB_NAME")
-    
-    # Constructing the connection string
-    # We use f-strings to plug in the variables
-    db_url = f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
-    
-    return create_engine(db_url)
+# ==========================================
+#   POOL CONFIGURATION (.env)
+# ==========================================
+#   DB_POOL_SIZE            persistent connections per engine      (default 5)
+#   DB_MAX_OVERFLOW         extra connections allowed under burst  (default 10)
+#   DB_POOL_TIMEOUT         seconds to wait for a free connection  (default 30)
+#   DB_POOL_PRE_PING        1 = test connections on checkout       (default 0)
+#   DB_STATEMENT_TIMEOUT_MS Postgres statement_timeout, 0 = off    (default 0)
+
+def get_pool_config():
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true", "yes"),
+    }
+
+def get_statement_timeout_ms():
+    return int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+
+class PoolMetrics:
+    """Counters behind get_pool_stats(): how often, and how long, callers wait for a connection."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self.lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def attach(self, engine):
+        sync_engine = getattr(engine, "sync_engine", engine)
+        sync_engine.pool.metrics = self
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(*args):
+            with self.lock: self.checkouts += 1
+
+        @event.listens_for(sync_engine, "checkin")
+        def on_checkin(*args):
+            with self.lock: self.checkins += 1
+
+        @event.listens_for(sync_engine, "connect")
+        def on_connect(*args):
+            with self.lock: self.connects += 1
+
+
+class _TimedPoolMixin:
+    """Times every checkout, including the wait for a free slot when the pool is exhausted."""
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics: self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics: self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the same counters
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# One engine per URL for the whole process (API, Streamlit reruns, scripts)
+_ENGINES = {}
+_ASYNC_ENGINES = {}
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine(db_url=None):
+    """Returns the shared, pooled SQLAlchemy engine (defaults to the .env database)"""
+    db_url = db_url or get_db_config()
+    with _ENGINE_LOCK:
+        engine = _ENGINES.get(db_url)
+        if engine is None:
+            connect_args = {}
+            timeout_ms = get_statement_timeout_ms()
+            if timeout_ms:
+                connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+            engine = create_engine(db_url, poolclass=TimedQueuePool, connect_args=connect_args, **get_pool_config())
+            PoolMetrics().attach(engine)
+            _ENGINES[db_url] = engine
+    return engine
 
 def get_db_config():
     """Returns the raw connection string if needed for other tools"""
@@ -26,4 +121,107 @@ def get_db_config():
     host = os.getenv("DB_HOST")
     port = os.getenv("DB_PORT")
     db_name = os.getenv("DB_NAME")
-    return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
\ No newline at end of file
+    return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
+
+def get_pool_stats(engine=None):
+    """Live pool occupancy plus cumulative checkout/wait counters for one engine (default: .env engine)."""
+    engine = engine or get_engine()
+    pool = getattr(engine, "sync_engine", engine).pool
+    metrics = pool.metrics or PoolMetrics()
+    with metrics.lock:
+        waits = metrics.checkouts or 1
+        return {
+            "url": engine.url.render_as_string(hide_password=True),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": metrics.checkouts,
+            "checkins": metrics.checkins,
+            "connects": metrics.connects,
+            "timeouts": metrics.timeouts,
+            "wait_ms_avg": round(metrics.wait_total / waits * 1000, 3),
+            "wait_ms_max": round(metrics.wait_max * 1000, 3),
+        }
+
+def get_all_pool_stats():
+    with _ENGINE_LOCK:
+        engines = list(_ENGINES.values()) + list(_ASYNC_ENGINES.values())
+    return [get_pool_stats(engine) for engine in engines]
+
+def dispose_engines(close=True):
+    """
+    Drop every pooled sync connection. close=False is for a child process after fork:
+    it forgets the parent's sockets without closing them under the parent's feet.
+    """
+    with _ENGINE_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose(close=close)
+
+def copy_rows(engine, table, columns, rows):
+    """
+    Bulk load with Postgres COPY FROM STDIN (CSV). `rows` is an iterable of tuples/lists
+    in `columns` order; None is written as NULL. Works with psycopg2 and psycopg 3.
+    """
+    import csv
+    import io
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["\\N" if v is None else v for v in row])
+    buf.seek(0)
+    copy_csv(engine, table, columns, buf)
+
+def copy_frame(engine, table, df):
+    """copy_rows for a DataFrame: serialized by pandas' C CSV writer (NaN/None -> NULL)."""
+    import io
+
+    buf = io.StringIO()
+    df.to_csv(buf, header=False, index=False, na_rep="\\N")
+    buf.seek(0)
+    copy_csv(engine, table, list(df.columns), buf)
+
+def copy_csv(engine, table, columns, buf):
+    """COPY an already-formatted CSV buffer (NULL written as \\N) into `table`."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        if hasattr(cur, "copy_expert"):
+            cur.copy_expert(sql, buf)
+        else:
+            with cur.copy(sql) as copy:
+                copy.write(buf.getvalue())
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+# ==========================================
+#   ASYNC ACCESS (FastAPI scoring path)
+# ==========================================
+
+def to_async_url(db_url):
+    """postgresql://... -> postgresql+asyncpg://... (same credentials, async driver)"""
+    return db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+def get_async_engine(db_url=None):
+    """Returns the shared SQLAlchemy AsyncEngine (asyncpg), same pool settings as get_engine()"""
+    # Imported here so sync-only tools (Streamlit, generate_data) don't need asyncpg
+    from sqlalchemy.ext.asyncio import create_async_engine
+    db_url = to_async_url(db_url or get_db_config())
+    with _ENGINE_LOCK:
+        engine = _ASYNC_ENGINES.get(db_url)
+        if engine is None:
+            connect_args = {}
+            timeout_ms = get_statement_timeout_ms()
+            if timeout_ms:
+                connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+            engine = create_async_engine(db_url, poolclass=TimedAsyncQueuePool, connect_args=connect_args, **get_pool_config())
+            PoolMetrics().attach(engine)
+            _ASYNC_ENGINES[db_url] = engine
+    return engine
@@ -0,0 +1,87 @@
+import threading
+from collections import defaultdict
+from sqlalchemy import text
+
+# Must stay in sync with the OpEx definition of the live SQL features in api.py
+OPEX_CATEGORIES = ('Electricity Bill', 'Rent', 'Metro Recharge')
+
+
+class FeatureStore:
+    """
+    In-process Online Feature Store.
+    Holds the running aggregates behind get_live_features so scoring needs no DB round trip:
+      - customer_id -> [total_amount, opex_count, txn_count]
+      - device_id   -> set(customer_id)   (Synthetic Identity signal)
+    Warmed once from `transactions`, then updated by every INSERT the API makes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.customer_totals = {}
+        self.device_customers = defaultdict(set)
+        self.customer_devices = defaultdict(set)
+        self.is_warm = False
+
+    def warm(self, engine):
+        """Bulk load from Postgres: one GROUP BY for customers, one DISTINCT scan for devices."""
+        opex_list = ", ".join(f"'{c}'" for c in OPEX_CATEGORIES)
+        q_cust = text(f"""
+            SELECT customer_id, SUM(amount) as total,
+            SUM(CASE WHEN payment_method_detail IN ({opex_list}) THEN 1 ELSE 0 END) as opex,
+            COUNT(*) as txns
+            FROM transactions GROUP BY customer_id
+        """)
+        q_dev = text("SELECT DISTINCT device_id, customer_id FROM transactions WHERE device_id IS NOT NULL")
+
+        customer_totals = {}
+        device_customers = defaultdict(set)
+        customer_devices = defaultdict(set)
+        with engine.connect() as conn:
+            for cid, total, opex, txns in conn.execute(q_cust):
+                customer_totals[cid] = [float(total or 0), int(opex or 0), int(txns)]
+            result = conn.execution_options(stream_results=True, yield_per=50000).execute(q_dev)
+            for dev, cid in result:
+                device_customers[dev].add(cid)
+                customer_devices[cid].add(dev)
+
+        with self.lock:
+            self.customer_totals = customer_totals
+            self.device_customers = device_customers
+            self.customer_devices = customer_devices
+            self.is_warm = True
+        print(f"✅ Feature Store warmed: {len(customer_totals)} customers, {len(device_customers)} devices")
+
+    def record(self, row):
+        """Fold one freshly inserted transaction row (dict keyed by column name) into the aggregates."""
+        cid = row.get('customer_id')
+        dev = row.get('device_id')
+        with self.lock:
+            stats = self.customer_totals.setdefault(cid, [0.0, 0, 0])
+            stats[0] += float(row.get('amount') or 0)
+            stats[1] += 1 if row.get('payment_method_detail') in OPEX_CATEGORIES else 0
+            stats[2] += 1
+            if dev is not None:
+                self.device_customers[dev].add(cid)
+                self.customer_devices[cid].add(dev)
+
+    def live_features(self, customer_id, amount, device_id):
+        """Same output as api.get_live_features: ([amount, opex_ratio, users_on_dev], users_on_dev)"""
+        with self.lock:
+            total, opex, _ = self.customer_totals.get(customer_id, (0.0, 0, 0))
+            users_on_dev = len(self.device_customers.get(device_id, ()))
+        opex_ratio = opex / (total + amount + 1)
+        return [amount, opex_ratio, users_on_dev], users_on_dev
+
+    def snapshot(self, customer_id):
+        """Current values for one customer (debug view)."""
+        with self.lock:
+            total, opex, txns = self.customer_totals.get(customer_id, (0.0, 0, 0))
+            devices = {dev: len(self.device_customers.get(dev, ())) for dev in sorted(self.customer_devices.get(customer_id, ()))}
+        return {
+            "customer_id": customer_id,
+            "total_amount": round(total, 2),
+            "opex_count": opex,
+            "txn_count": txns,
+            "opex_ratio": opex / (total + 1),
+            "users_on_device": devices,
+        }
@@ -3,9 +3,9 @@
 
 from fastapi import FastAPI
 from pydantic import BaseModel
-import pandas as pd
 # UPDATED: Importing your central engine instead of local create_engine
 from database import get_engine
+from query_registry import register
 
 # --- DATABASE CONNECTION ---
 # REPLACED: No longer hardcoding the password here. 
@@ -22,14 +22,17 @@ class Transaction(BaseModel):
 
 app = FastAPI()
 
+Q_CUSTOMER_HISTORY = register("legacy_customer_history", """
+    SELECT amount, beneficiary_name, device_used FROM transactions WHERE customer_name = :customer_name AND is_fraud = 0
+""")
+
 # --- FRAUD DETECTION LOGIC (Upgraded) ---
 def get_fraud_verdict(customer_name: str, new_tx_amount: float, new_beneficiary_name: str, new_device: str):
     # UPDATED: Calling the new engine function
     engine = get_db_engine()
     
     # Fetch more historical data for a richer profile
-    query = f"SELECT amount, beneficiary_name, device_used FROM transactions WHERE customer_name = '{customer_name}' AND is_fraud = 0"
-    history_df = pd.read_sql(query, engine)
+    history_df = Q_CUSTOMER_HISTORY.frame(engine, {"customer_name": customer_name})
     
     if history_df.empty:
         return "High Risk", 1, ["No historical data for this customer (High Risk by default)."]
@@ -0,0 +1,56 @@
+"""
+Canonical fraud types. `transactions.fraud_type` stays the free-form verdict detail the writer
+chose (GNN_STAR, "Daily Volume Spike", a truncated pattern message, ...); `transactions.fraud_code`
+is the SMALLINT assigned from it at write time (api.log_transactions, generate_data.py), and
+everything that groups or charts by type reads the code.
+"""
+from functools import lru_cache
+
+CLEAN, STAR, SHELL, SYNTHETIC, CIRCULAR, LOCATION, SPIKE, OTHER = range(8)
+
+# fraud_code -> display name
+FRAUD_TYPE_NAMES = ('None', 'Star Topology (Mule)', 'Shell Company (Zombie)', 'Synthetic Identity',
+                    'Circular Topology', 'Location Hopping', 'Amount/Velocity Spike', 'Other')
+
+# The six crime types the dashboards chart
+CRIME_CODES = (STAR, SHELL, SYNTHETIC, CIRCULAR, LOCATION, SPIKE)
+FRAUD_TYPE_COLORS = {
+    'Star Topology (Mule)': '#FF5252',
+    'Shell Company (Zombie)': '#FF7043',
+    'Synthetic Identity': '#AB47BC',
+    'Circular Topology': '#FFCA28',
+    'Location Hopping': '#26C6DA',
+    'Amount/Velocity Spike': '#EF5350',
+}
+
+# Keywords per code, checked in this order (first match wins)
+_KEYWORDS = (
+    (STAR, ('star', 'mule')),
+    (SHELL, ('shell', 'zombie')),
+    (SYNTHETIC, ('device', 'synthetic')),
+    (CIRCULAR, ('cycle', 'circular', 'loop')),
+    (LOCATION, ('location', 'travel', 'hopping')),
+    (SPIKE, ('amount', 'velocity', 'spike', 'pattern')),
+)
+
+
+@lru_cache(maxsize=1024)
+def normalize(fraud_type):
+    """Free-form fraud_type -> canonical code (OTHER if no keyword matches). Cached: writers repeat a few strings."""
+    s = str(fraud_type).lower()
+    for code, keywords in _KEYWORDS:
+        if any(k in s for k in keywords):
+            return code
+    return OTHER
+
+def fraud_code(is_fraud, fraud_type):
+    """Code written with a transaction: CLEAN unless it was flagged."""
+    return normalize(fraud_type) if is_fraud == 1 else CLEAN
+
+def fraud_name(code):
+    return FRAUD_TYPE_NAMES[code] if code is not None and 0 <= code < len(FRAUD_TYPE_NAMES) else FRAUD_TYPE_NAMES[OTHER]
+
+def categorical(codes):
+    """fraud_code column -> pandas Categorical of FRAUD_TYPE_NAMES (no per-row string work; NULL stays NaN)."""
+    import pandas as pd
+    return pd.Categorical.from_codes(codes.fillna(-1).astype(int), categories=FRAUD_TYPE_NAMES)
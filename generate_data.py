@@ -1,11 +1,17 @@
+import os
+import argparse
+import multiprocessing
 import pandas as pd
 import numpy as np
 from sqlalchemy import create_engine, text
 from faker import Faker
-import random
 from datetime import datetime, timedelta
 # Import the engine logic
-from database import get_engine
+from database import get_engine, copy_rows, copy_frame, dispose_engines
+from txn_logger import TXN_COLUMNS
+from profile_updater import PERIODS
+from rollups import rebuild as rebuild_rollups
+from fraud_types import CLEAN, normalize
 
 # ==========================================
 # 1. SETUP & CONFIGURATION
@@ -13,8 +19,11 @@ from database import get_engine
 # REPLACED: DB_CONN string and hardcoded create_engine
 engine = get_engine() 
 
-NUM_TRANSACTIONS = 105000  # Fixed as requested
-NUM_CUSTOMERS = 5000       # Pool of distinct users
+NUM_TRANSACTIONS = int(os.getenv("GEN_ROWS", "105000"))   # Volume (tens of millions is fine: rows stream in chunks)
+CHUNK_SIZE = int(os.getenv("GEN_CHUNK_ROWS", "50000"))     # Rows generated + COPYed per chunk (bounds memory)
+NUM_CUSTOMERS = int(os.getenv("GEN_CUSTOMERS", "5000"))  # Pool of distinct users
+GEN_SEED = int(os.getenv("GEN_SEED")) if os.getenv("GEN_SEED") else None  # Same seed (and workers) -> same dataset
+GEN_WORKERS = int(os.getenv("GEN_WORKERS", "1"))          # Shard processes (1 = generate in this process)
 faker = Faker('en_IN')     # Indian Names context
 
 # (Your functions calculate_time_period, master_setup, etc. continue exactly as they were below)
@@ -25,7 +34,302 @@ def calculate_time_period(hour):
     elif 17 <= hour < 22: return 'Evening'
     else: return 'Night'
 
-def master_setup():
+def time_periods(hours):
+    """calculate_time_period for a whole array of hours."""
+    hours = np.asarray(hours)
+    return np.select(
+        [(hours >= 5) & (hours < 12), (hours >= 12) & (hours < 17), (hours >= 17) & (hours < 22)],
+        ['Morning', 'Afternoon', 'Evening'], default='Night')
+
+
+class ProfileBuilder:
+    """
+    Beneficiary / Timeline / Device profiles folded from the transaction chunks as they
+    are loaded (no re-read of `transactions`). Each chunk is reduced to small per-key
+    partial aggregates; partials are merged every few chunks, so memory follows the
+    number of distinct customers/beneficiaries/devices, not the number of rows.
+    """
+    COMPACT_EVERY = 8
+
+    def __init__(self):
+        self.spans = []     # customer -> first/last timestamp, grand_total
+        self.bens = []      # (customer, beneficiary) -> total_amount, txn_count
+        self.devices = []   # (customer, device) -> count
+        self.periods = []   # (customer, time_of_day) -> count
+
+    def add(self, chunk):
+        ts = pd.to_datetime(chunk['timestamp'])
+        self.spans.append(chunk.assign(timestamp=ts).groupby('customer_id').agg(
+            first=('timestamp', 'min'), last=('timestamp', 'max'), grand_total=('amount', 'sum')))
+        self.bens.append(chunk.groupby(['customer_id', 'beneficiary_account']).agg(
+            total_amount=('amount', 'sum'), txn_count=('amount', 'size')))
+        self.devices.append(chunk.groupby(['customer_id', 'device_id']).size().rename('count'))
+        self.periods.append(chunk.groupby([chunk['customer_id'], pd.Series(time_periods(ts.dt.hour), index=chunk.index, name='time_of_day')]).size())
+        if len(self.spans) >= self.COMPACT_EVERY:
+            self._compact()
+
+    def merge(self, other):
+        """Fold another builder's partials (e.g. a shard's) into this one."""
+        for name in ('spans', 'bens', 'devices', 'periods'):
+            getattr(self, name).extend(getattr(other, name))
+        if len(self.spans) >= self.COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self):
+        if len(self.spans) > 1:
+            spans = pd.concat(self.spans).groupby(level=0)
+            self.spans = [spans.agg({'first': 'min', 'last': 'max', 'grand_total': 'sum'})]
+        for name in ('bens', 'devices', 'periods'):
+            parts = getattr(self, name)
+            if len(parts) > 1:
+                setattr(self, name, [pd.concat(parts).groupby(level=[0, 1]).sum()])
+
+    def build(self):
+        """-> (profile_beneficiary, profile_timeline, profile_device_usage) DataFrames."""
+        self._compact()
+        spans = self.spans[0]
+
+        # Active Days
+        active_days = (spans['last'] - spans['first']).dt.days.replace(0, 1).rename('active_days')
+
+        # A. Beneficiary Profile
+        ben_profile = self.bens[0].reset_index().merge(active_days, left_on='customer_id', right_index=True, how='left')
+        ben_profile['daily_avg'] = (ben_profile['total_amount'] / ben_profile['active_days']).round(2)
+        ben_profile['weekly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/7).replace(0,1)).round(2)
+        ben_profile['monthly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/30).replace(0,1)).round(2)
+        ben_profile['yearly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/365).replace(0,1)).round(2)
+
+        # B. Timeline Profile
+        time_profile = spans.rename(columns={'first': 'first_txn', 'last': 'last_txn'}).join(active_days).reset_index()
+        time_profile['global_daily_avg'] = (time_profile['grand_total'] / time_profile['active_days']).round(2)
+        time_profile['global_weekly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/7).replace(0,1)).round(2)
+        time_profile['global_monthly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/30).replace(0,1)).round(2)
+        time_profile['global_yearly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/365).replace(0,1)).round(2)
+
+        # C. Device Profile
+        dev_counts = self.devices[0].reset_index()
+        most_used = dev_counts.sort_values(['customer_id', 'count'], ascending=[True, False], kind='stable').groupby('customer_id').head(1)
+        most_used = most_used.rename(columns={'device_id': 'favorite_device'})
+        time_counts = self.periods[0].unstack('time_of_day', fill_value=0).reindex(columns=PERIODS, fill_value=0).sort_index(axis=1)
+        time_counts.columns.name = None
+        device_profile = pd.merge(most_used[['customer_id', 'favorite_device']], time_counts.reset_index(), on='customer_id')
+
+        return ben_profile, time_profile, device_profile
+
+
+# ==========================================
+# ACTORS (The "Cast")
+# ==========================================
+# --- ASSIGN ROLES (So we can find them in the Demo) ---
+# 1. THE MULE (Star Topology)
+MULE_ID = 9001
+# 2. THE SHELL COMPANY (Zero OpEx, High Value)
+SHELL_ID = 9002
+# 3. THE DEVICE FARM (Synthetic Identities): 10 users sharing one device
+FARM_USERS = list(range(9010, 9020))
+FARM_DEVICE_ID = "ONEPLUS_ROOTED_DEV_X"
+# 4. THE CIRCULAR LOOP (Layering): A -> B -> C -> A
+CIRCLE_USERS = [8001, 8002, 8003]
+# 5. THE TRAVELER (Location Hopping)
+TRAVELER_ID = 9005
+# 6. THE SPIKER (Velocity/Amount Spike)
+SPIKER_ID = 9006
+
+SPECIAL_IDS = [MULE_ID, SHELL_ID, TRAVELER_ID, SPIKER_ID] + FARM_USERS + CIRCLE_USERS
+SPECIAL_NAMES = {MULE_ID: "Rahul (The Mule)", SHELL_ID: "Apex Global Consultants",
+                 TRAVELER_ID: "Vikram Traveler", SPIKER_ID: "Suresh Spiker",
+                 **{cid: f"Trader {cid}" for cid in CIRCLE_USERS},
+                 **{cid: f"Bot User {cid}" for cid in FARM_USERS}}
+
+CITIES_POOL = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Pune', 'Hyderabad']
+OPEX_CATEGORIES = ['Electricity Bill', 'Rent', 'Broadband', 'Zomato', 'Groceries', 'Uber']
+VENDOR_CATEGORIES = ['Vendor Payment', 'Consulting Fee', 'Logistics', 'Raw Materials']
+
+# --- SCENARIO MIX (Targeting ~8.5% Fraud) ---
+# A roll in [0, 1) below cut i picks scenario i; the rest (91.5%) are normal transactions
+MULE, SHELL, FARM, CIRCLE, TRAVEL, SPIKE, NORMAL = range(7)
+SCENARIO_CUTS = np.array([0.02, 0.03, 0.045, 0.06, 0.07, 0.085])
+FRAUD_TYPES = np.array(["Star Topology (Mule)", "Shell Company (Zombie)", "Synthetic Identity",
+                        "Circular Topology", "Location Hopping", "Amount/Velocity Spike", "None"], dtype=object)
+# Canonical code per scenario (fraud_types.py); NORMAL rows are clean
+FRAUD_CODES = np.array([normalize(t) for t in FRAUD_TYPES[:NORMAL]] + [CLEAN], dtype=np.int16)
+
+
+CAST_SLICE = 50_000     # Customers per cast slice (fixed, so the cast doesn't depend on the worker count)
+SECONDS_PER_ROW = 165   # Mean clock step between transactions (30-300s), used to lay out the shards' time ranges
+
+
+def seed_sequence(seed):
+    """int / None (fresh OS entropy) / SeedSequence -> SeedSequence."""
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def _cast_slice(task):
+    """Attributes of one slice of the customer ID space, from its own seed."""
+    ids, population, seed = task
+    rng = np.random.default_rng(seed)
+    n = len(ids)
+    # Name generation (faker is seeded from the same stream, so names are reproducible too)
+    faker.seed_instance(int(rng.integers(2**32)))
+    return {
+        "names": np.array([SPECIAL_NAMES.get(cid) or faker.name() for cid in ids.tolist()], dtype=object),
+        "cities": np.array(CITIES_POOL, dtype=object)[rng.integers(0, len(CITIES_POOL), n)],
+        "devices": np.array([f"Dev_{cid}_{ab}" for cid, ab in zip(ids.tolist(), rng.choice(['A', 'B'], n))], dtype=object),
+        # Sticky beneficiaries (Normal behavior): 3 positions per customer, into `accounts`
+        "beneficiaries": rng.integers(0, population, (n, 3)),
+        # Risk Score (For sorting in dropdowns later)
+        "risk": np.where(np.isin(ids, SPECIAL_IDS), 90, rng.integers(0, 11, n)),
+    }
+
+
+class Cast:
+    """
+    The customer population as arrays indexed by position (ids are sorted), so the
+    transaction generator can pick customers and look up their attributes with fancy
+    indexing instead of dict lookups. The ID space is built in CAST_SLICE slices, each
+    from its own seed; pass a process pool's `map` to build them in parallel.
+    """
+
+    def __init__(self, seed=None, num_customers=NUM_CUSTOMERS, first_id=1000, pool_map=map):
+        # We create a pool of IDs; special IDs are merged in so they exist in the customer table
+        general = np.arange(first_id, first_id + num_customers)
+        self.ids = np.union1d(general, SPECIAL_IDS)
+        self.pos = {cid: int(np.searchsorted(self.ids, cid)) for cid in SPECIAL_IDS}
+
+        slices = np.array_split(self.ids, -(-len(self.ids) // CAST_SLICE))
+        seeds = seed_sequence(seed).spawn(len(slices))
+        parts = list(pool_map(_cast_slice, [(ids, len(self.ids), sq) for ids, sq in zip(slices, seeds)]))
+        for field in parts[0]:
+            setattr(self, field, np.concatenate([part[field] for part in parts]))
+        self.accounts = np.array([f"ACC_{cid}" for cid in self.ids.tolist()], dtype=object)
+
+        # Positions of the roles, and of the general pool that victims are drawn from
+        self.mule_victims = np.flatnonzero(np.isin(self.ids, general) & (self.ids != MULE_ID))
+        self.farm = np.array([self.pos[cid] for cid in FARM_USERS])
+        self.circle = np.array([self.pos[cid] for cid in CIRCLE_USERS])
+
+    def frame(self):
+        return pd.DataFrame({"customer_id": self.ids, "customer_name": self.names, "risk_score": self.risk})
+
+
+RANDOM_ACCOUNTS = np.array([f"ACC_{i}" for i in range(1000, 10000)], dtype=object)
+
+
+def generate_chunk(rng, cast, n, start):
+    """
+    n transactions (TXN_COLUMNS order) starting after `start`, drawn as whole arrays:
+    one roll per row picks the scenario, then each column is filled per scenario with masks.
+    -> (DataFrame, timestamp of the last row).
+    """
+    # Slowly advance time (random 30-300 seconds jump per row)
+    clock = np.datetime64(start, 'us') + np.cumsum(rng.integers(30, 301, n)).astype('timedelta64[s]')
+    scenario = np.searchsorted(SCENARIO_CUTS, rng.random(n), side='right')
+    is_ = [scenario == k for k in range(7)]
+
+    # Who is sending: a random customer, unless a role owns the scenario
+    idx = rng.integers(0, len(cast.ids), n)
+    idx[is_[MULE]] = cast.mule_victims[rng.integers(0, len(cast.mule_victims), is_[MULE].sum())]  # Random Victim -> Mule
+    idx[is_[SHELL]] = cast.pos[SHELL_ID]
+    idx[is_[FARM]] = cast.farm[rng.integers(0, len(cast.farm), is_[FARM].sum())]
+    step = rng.integers(0, 3, is_[CIRCLE].sum())                                                # A -> B, B -> C, or C -> A
+    idx[is_[CIRCLE]] = cast.circle[step]
+    idx[is_[TRAVEL]] = cast.pos[TRAVELER_ID]
+    idx[is_[SPIKE]] = cast.pos[SPIKER_ID]
+
+    amount = np.round(rng.uniform(100, 20000, n), 2)
+    amount[is_[MULE]] = np.round(rng.uniform(25000, 48000, is_[MULE].sum()), 2)         # Just under 50k limit
+    amount[is_[SHELL]] = np.round(rng.uniform(500000, 2000000, is_[SHELL].sum()), 2)    # Huge amount
+    amount[is_[FARM]] = np.round(rng.uniform(5000, 9000, is_[FARM].sum()), 2)
+    amount[is_[CIRCLE]] = 150000.00   # Fixed layering amount
+    amount[is_[TRAVEL]] = 250000.00
+    amount[is_[SPIKE]] = 800000.00    # Huge Spike
+    times = clock.copy()
+    times[is_[TRAVEL]] += np.timedelta64(10, 'm')  # Impossible travel time
+
+    device = cast.devices[idx]
+    device[is_[SHELL]] = "HQ_SERVER_01"
+    device[is_[FARM]] = FARM_DEVICE_ID  # <--- SHARED DEVICE
+
+    # Normal: 80% sticky beneficiary, 20% random account
+    sticky = cast.accounts[cast.beneficiaries[idx, rng.integers(0, 3, n)]]
+    beneficiary = np.where(rng.random(n) < 0.8, sticky, RANDOM_ACCOUNTS[rng.integers(0, len(RANDOM_ACCOUNTS), n)])
+    beneficiary[is_[MULE]] = f"ACC_{MULE_ID}"  # <--- THE TRAP
+    beneficiary[is_[SHELL]] = "OFFSHORE_HOLDINGS_LLC"
+    beneficiary[is_[FARM]] = "FARM_MASTER_ACC"
+    beneficiary[is_[CIRCLE]] = cast.accounts[cast.circle[(step + 1) % 3]]  # <--- LOOP
+    beneficiary[is_[TRAVEL]] = "CASINO_ROYALE"
+    beneficiary[is_[SPIKE]] = "LUXURY_JEWELERS"
+
+    city = cast.cities[idx]
+    for k, c in ((SHELL, "Delhi"), (FARM, "Bangalore"), (CIRCLE, "Mumbai"), (TRAVEL, "London"), (SPIKE, "Pune")):
+        city[is_[k]] = c
+
+    # Normal: 30% opex categories, else vendor categories
+    method = np.where(rng.random(n) < 0.3,
+                      np.array(OPEX_CATEGORIES, dtype=object)[rng.integers(0, len(OPEX_CATEGORIES), n)],
+                      np.array(VENDOR_CATEGORIES, dtype=object)[rng.integers(0, len(VENDOR_CATEGORIES), n)])
+    for k, m in ((MULE, "Transfer"), (SHELL, "Consulting Income"), (FARM, "Loan Disbursal"),
+                 (CIRCLE, "Investment"), (TRAVEL, "Gambling"), (SPIKE, "Jewelry")):
+        method[is_[k]] = m
+
+    chunk = pd.DataFrame({
+        "customer_id": cast.ids[idx], "customer_name": cast.names[idx],
+        "amount": amount, "timestamp": times, "device_id": device,
+        "beneficiary_account": beneficiary, "customer_account_number": cast.accounts[idx],
+        "city": city, "payment_method_detail": method,
+        "is_fraud": (scenario != NORMAL).astype(np.int32), "fraud_type": FRAUD_TYPES[scenario],
+        "fraud_code": FRAUD_CODES[scenario],
+    }, columns=TXN_COLUMNS)
+    return chunk, clock[-1] if n else np.datetime64(start, 'us')
+
+
+# ==========================================
+# SHARDS (one time range of the transactions each)
+# ==========================================
+_shard_cast = None
+# A forked worker inherits this (a spawned one re-imports, so it matches there: nothing inherited)
+_parent_pid = os.getpid()
+
+def _init_shard_worker(cast):
+    global _shard_cast
+    _shard_cast = cast
+    if os.getpid() != _parent_pid:
+        # Pools inherited from the parent belong to the parent: forget them without closing
+        dispose_engines(close=False)
+
+def _load_shard(task):
+    """Generate and COPY one shard through this process' own connection. -> (shard, rows, ProfileBuilder)."""
+    shard, rows, start, seed = task
+    rng = np.random.default_rng(seed)
+    profiles = ProfileBuilder()
+    loaded, clock = 0, start
+    while loaded < rows:
+        chunk, clock = generate_chunk(rng, _shard_cast, min(CHUNK_SIZE, rows - loaded), clock)
+        copy_frame(engine, 'transactions', chunk)
+        profiles.add(chunk)
+        loaded += len(chunk)
+        print(f"   Shard {shard}: loaded {loaded}/{rows} transactions...")
+    profiles._compact()
+    return shard, loaded, profiles
+
+def shard_tasks(rows, workers, start, seed):
+    """
+    Split `rows` into `workers` contiguous time ranges, each with its own seed: shard k starts
+    where the rows before it would have advanced the clock (SECONDS_PER_ROW on average).
+    """
+    counts = [rows // workers + (k < rows % workers) for k in range(workers)]
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    seeds = seed_sequence(seed).spawn(workers)
+    return [(k, counts[k], start + timedelta(seconds=int(offsets[k]) * SECONDS_PER_ROW), seeds[k])
+            for k in range(workers)]
+
+
+def replace_table(df, table):
+    """to_sql(if_exists='replace') semantics, but the rows go in through COPY."""
+    df.head(0).to_sql(table, engine, if_exists='replace', index=False)
+    copy_rows(engine, f'"{table}"', [f'"{c}"' for c in df.columns], df.itertuples(index=False, name=None))
+
+def master_setup(rows=NUM_TRANSACTIONS, customers=NUM_CUSTOMERS, workers=GEN_WORKERS, seed=GEN_SEED):
     print("🚀 STARTING MASTER DATA GENERATION (HIGH FRAUD DENSITY MODE)...")
 
     # ==========================================
@@ -42,6 +346,7 @@ def master_setup():
         conn.execute(text("DROP TABLE IF EXISTS profile_device_usage CASCADE"))
         conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS profile_customer_stats CASCADE"))
         conn.execute(text("DROP VIEW IF EXISTS v_enriched_transactions CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS txn_rollups CASCADE"))
         conn.commit()
 
         # Create Tables
@@ -67,7 +372,8 @@ def master_setup():
                 city VARCHAR(50),
                 payment_method_detail VARCHAR(50),
                 is_fraud INT,
-                fraud_type VARCHAR(50)
+                fraud_type VARCHAR(50),
+                fraud_code SMALLINT
             );
         """))
         conn.commit()
@@ -76,222 +382,50 @@ def master_setup():
     # 3. DEFINE ACTORS (The "Cast")
     # ==========================================
     print(f"👥 Step 3: Pre-assigning Fraud Roles to specific Customers...")
-    
-    # We create a pool of IDs
-    all_ids = list(range(1000, 1000 + NUM_CUSTOMERS))
-    
-    # --- ASSIGN ROLES (So we can find them in the Demo) ---
-    # 1. THE MULE (Star Topology)
-    MULE_ID = 9001
-    
-    # 2. THE SHELL COMPANY (Zero OpEx, High Value)
-    SHELL_ID = 9002
-    
-    # 3. THE DEVICE FARM (Synthetic Identities)
-    # 10 users sharing one device
-    FARM_USERS = list(range(9010, 9020)) 
-    FARM_DEVICE_ID = "ONEPLUS_ROOTED_DEV_X"
-    
-    # 4. THE CIRCULAR LOOP (Layering)
-    # A -> B -> C -> A
-    CIRCLE_USERS = [8001, 8002, 8003]
-    
-    # 5. THE TRAVELER (Location Hopping)
-    TRAVELER_ID = 9005
-    
-    # 6. THE SPIKER (Velocity/Amount Spike)
-    SPIKER_ID = 9006
-
-    # Combine all special IDs into the main pool so they exist in the customer table
-    special_ids = [MULE_ID, SHELL_ID, TRAVELER_ID, SPIKER_ID] + FARM_USERS + CIRCLE_USERS
-    
-    # Customer Metadata Dicts
-    customers = {}
-    cust_cities = {}
-    cust_devices = {}
-    cust_beneficiaries = {}
-    
-    cities_pool = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Pune', 'Hyderabad']
-
-    # Generate Profile Data
-    cust_data_rows = []
-    
-    # Helper to generate normal users + special users
-    full_population = list(set(all_ids + special_ids))
-    
-    for cid in full_population:
-        # Name generation
-        if cid == MULE_ID: name = "Rahul (The Mule)"
-        elif cid == SHELL_ID: name = "Apex Global Consultants"
-        elif cid in CIRCLE_USERS: name = f"Trader {cid}"
-        elif cid in FARM_USERS: name = f"Bot User {cid}"
-        elif cid == TRAVELER_ID: name = "Vikram Traveler"
-        elif cid == SPIKER_ID: name = "Suresh Spiker"
-        else: name = faker.name()
-        
-        city = random.choice(cities_pool)
-        device = f"Dev_{cid}_{random.choice(['A','B'])}"
-        
-        customers[cid] = name
-        cust_cities[cid] = city
-        cust_devices[cid] = device
-        
-        # Sticky beneficiaries (Normal behavior)
-        cust_beneficiaries[cid] = [f"ACC_{random.choice(full_population)}" for _ in range(3)]
-        
-        # Risk Score (For sorting in dropdowns later)
-        risk = 90 if cid in special_ids else random.randint(0, 10)
-        
-        cust_data_rows.append({"customer_id": cid, "customer_name": name, "risk_score": risk})
+    cast_seed, txn_seed = seed_sequence(seed).spawn(2)
+    workers = max(1, workers)
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        cast = Cast(cast_seed, customers, pool_map=pool.map if pool else map)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
 
     # Save Customer Profiles to DB
-    pd.DataFrame(cust_data_rows).to_sql('customers', engine, if_exists='append', index=False)
-    print("✅ Customer Profiles Created.")
+    copy_frame(engine, 'customers', cast.frame())
+    print(f"✅ {len(cast.ids)} Customer Profiles Created.")
 
     # ==========================================
-    # 4. GENERATE TRANSACTIONS (The "Noise" Loop)
+    # 4. GENERATE TRANSACTIONS (vectorized, sharded by time range)
     # ==========================================
-    print(f"⏳ Step 4: Generating {NUM_TRANSACTIONS} mixed transactions (Targeting ~8.5% Fraud)...")
-    
-    data = []
-    opex_categories = ['Electricity Bill', 'Rent', 'Broadband', 'Zomato', 'Groceries', 'Uber']
-    vendor_categories = ['Vendor Payment', 'Consulting Fee', 'Logistics', 'Raw Materials']
-
-    # Start time: 6 months ago
-    curr_time = datetime.now() - timedelta(days=180)
-    
-    for i in range(NUM_TRANSACTIONS):
-        # Slowly advance time (random seconds jump)
-        curr_time += timedelta(seconds=random.randint(30, 300))
-        
-        # --- PROBABILISTIC FRAUD INJECTION (Targeting ~8.5% Total) ---
-        # We roll a die (0.0 to 1.0) to decide if this transaction is fraud
-        roll = random.random()
-        
-        # 1. STAR TOPOLOGY (Mule) - 2.0% Chance
-        # Random normal users sending money TO the Mule
-        if roll < 0.02:
-            sender = random.choice(all_ids) # Random Victim from general pool
-            if sender == MULE_ID: continue
-            
-            row = {
-                "customer_id": sender, "customer_name": customers[sender],
-                "amount": round(random.uniform(25000, 48000), 2), # Just under 50k limit
-                "timestamp": curr_time, "device_id": cust_devices[sender],
-                "beneficiary_account": f"ACC_{MULE_ID}", # <--- THE TRAP
-                "customer_account_number": f"ACC_{sender}", "city": cust_cities[sender],
-                "payment_method_detail": "Transfer",
-                "is_fraud": 1, "fraud_type": "Star Topology (Mule)"
-            }
-
-        # 2. SHELL COMPANY - 1.0% Chance
-        # Shell company receiving big money
-        elif roll < 0.03:
-            row = {
-                "customer_id": SHELL_ID, "customer_name": customers[SHELL_ID],
-                "amount": round(random.uniform(500000, 2000000), 2), # Huge amount
-                "timestamp": curr_time, "device_id": "HQ_SERVER_01",
-                "beneficiary_account": "OFFSHORE_HOLDINGS_LLC",
-                "customer_account_number": f"ACC_{SHELL_ID}", "city": "Delhi",
-                "payment_method_detail": "Consulting Income",
-                "is_fraud": 1, "fraud_type": "Shell Company (Zombie)"
-            }
-
-        # 3. SYNTHETIC IDENTITY (Device Farm) - 1.5% Chance
-        # Farm bots sending money using the SHARED device
-        elif roll < 0.045:
-            cid = random.choice(FARM_USERS)
-            row = {
-                "customer_id": cid, "customer_name": customers[cid],
-                "amount": round(random.uniform(5000, 9000), 2),
-                "timestamp": curr_time, 
-                "device_id": FARM_DEVICE_ID, # <--- SHARED DEVICE
-                "beneficiary_account": "FARM_MASTER_ACC",
-                "customer_account_number": f"ACC_{cid}", "city": "Bangalore",
-                "payment_method_detail": "Loan Disbursal",
-                "is_fraud": 1, "fraud_type": "Synthetic Identity"
-            }
-
-        # 4. CIRCULAR TOPOLOGY - 1.5% Chance
-        # A -> B, B -> C, or C -> A
-        elif roll < 0.06:
-            step = random.randint(0, 2)
-            sender = CIRCLE_USERS[step]
-            receiver = CIRCLE_USERS[(step + 1) % 3]
-            
-            row = {
-                "customer_id": sender, "customer_name": customers[sender],
-                "amount": 150000.00, # Fixed layering amount
-                "timestamp": curr_time, "device_id": cust_devices[sender],
-                "beneficiary_account": f"ACC_{receiver}", # <--- LOOP
-                "customer_account_number": f"ACC_{sender}", "city": "Mumbai",
-                "payment_method_detail": "Investment",
-                "is_fraud": 1, "fraud_type": "Circular Topology"
-            }
-
-        # 5. LOCATION HOPPING - 1.0% Chance
-        # Traveler makes a tx in London right after Mumbai
-        elif roll < 0.07:
-            # We assume he just made a normal tx in Mumbai (simulated by the normal flow), now this:
-            row = {
-                "customer_id": TRAVELER_ID, "customer_name": customers[TRAVELER_ID],
-                "amount": 250000.00,
-                "timestamp": curr_time + timedelta(minutes=10), # Impossible travel time
-                "device_id": cust_devices[TRAVELER_ID],
-                "beneficiary_account": "CASINO_ROYALE",
-                "customer_account_number": f"ACC_{TRAVELER_ID}", 
-                "city": "London", # <--- IMPOSSIBLE CITY
-                "payment_method_detail": "Gambling",
-                "is_fraud": 1, "fraud_type": "Location Hopping"
-            }
-
-        # 6. AMOUNT SPIKE - 1.5% Chance
-        # Spiker suddenly spends huge amount
-        elif roll < 0.085:
-            row = {
-                "customer_id": SPIKER_ID, "customer_name": customers[SPIKER_ID],
-                "amount": 800000.00, # Huge Spike
-                "timestamp": curr_time, "device_id": cust_devices[SPIKER_ID],
-                "beneficiary_account": "LUXURY_JEWELERS",
-                "customer_account_number": f"ACC_{SPIKER_ID}", "city": "Pune",
-                "payment_method_detail": "Jewelry",
-                "is_fraud": 1, "fraud_type": "Amount/Velocity Spike"
-            }
-
-        # 7. NORMAL TRANSACTION (91.5% Chance)
-        else:
-            cid = random.choice(full_population)
-            
-            # 80% sticky beneficiary, 20% random
-            if random.random() < 0.8:
-                ben_acc = random.choice(cust_beneficiaries[cid])
-            else:
-                ben_acc = f"ACC_{random.randint(1000, 9999)}"
-            
-            is_opex = random.random() < 0.3
-            cat = random.choice(opex_categories) if is_opex else random.choice(vendor_categories)
-
-            row = {
-                "customer_id": cid, "customer_name": customers[cid],
-                "amount": round(random.uniform(100, 20000), 2),
-                "timestamp": curr_time, "device_id": cust_devices[cid],
-                "beneficiary_account": ben_acc,
-                "customer_account_number": f"ACC_{cid}", 
-                "city": cust_cities[cid],
-                "payment_method_detail": cat,
-                "is_fraud": 0, "fraud_type": "None"
-            }
-
-        data.append(row)
-        
-        # Progress Logger
-        if i % 20000 == 0:
-            print(f"   Generated {i}/{NUM_TRANSACTIONS} transactions...")
-
-    # --- SAVE TO DB ---
-    print("💾 Saving transactions to Database...")
-    df = pd.DataFrame(data)
-    df.to_sql('transactions', engine, if_exists='append', index=False)
+    print(f"⏳ Step 4: Generating {rows} mixed transactions in {workers} shard(s) (Targeting ~8.5% Fraud)...")
+
+    # Each shard streams its rows to Postgres in chunks (COPY FROM STDIN) over its own
+    # connection and folds its profile partials from the same chunks; they are merged here
+    # Start time: 6 months ago (from midnight, so a seeded run is reproducible within the day)
+    start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=180)
+    tasks = shard_tasks(rows, workers, start, txn_seed)
+    profiles = ProfileBuilder()
+    loaded = 0
+    if workers == 1:
+        _init_shard_worker(cast)
+        results = map(_load_shard, tasks)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_shard_worker, initargs=(cast,))
+        results = pool.imap_unordered(_load_shard, tasks)
+    try:
+        for shard, count, shard_profiles in results:
+            profiles.merge(shard_profiles)
+            loaded += count
+            print(f"   Shard {shard} done ({loaded}/{rows} transactions).")
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE transactions"))
     print("✅ Transactions Saved.")
 
     # ==========================================
@@ -314,48 +448,27 @@ def master_setup():
         """))
         conn.commit()
 
-    # --- ADVANCED PROFILING (Pandas) ---
+    # --- ADVANCED PROFILING (from the loaded chunks, no re-read) ---
     print("📊 Step 6: Calculating Advanced Profiles...")
-    df = pd.read_sql("SELECT * FROM transactions", engine)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # Active Days
-    lifespan = df.groupby('customer_id')['timestamp'].agg(['min', 'max'])
-    lifespan['active_days'] = (lifespan['max'] - lifespan['min']).dt.days.replace(0, 1)
-    df = df.merge(lifespan[['active_days']], on='customer_id', how='left')
-
-    # A. Beneficiary Profile
-    ben_profile = df.groupby(['customer_id', 'beneficiary_account']).agg(
-        total_amount=('amount', 'sum'),
-        txn_count=('transaction_id', 'count'), 
-        active_days=('active_days', 'first')
-    ).reset_index()
-    ben_profile['daily_avg'] = (ben_profile['total_amount'] / ben_profile['active_days']).round(2)
-    ben_profile['weekly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/7).replace(0,1)).round(2)
-    ben_profile['monthly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/30).replace(0,1)).round(2)
-    ben_profile['yearly_avg'] = (ben_profile['total_amount'] / (ben_profile['active_days']/365).replace(0,1)).round(2)
-    ben_profile.to_sql('profile_beneficiary', engine, if_exists='replace', index=False)
-
-    # B. Timeline Profile
-    time_profile = df.groupby('customer_id').agg(
-        grand_total=('amount', 'sum'),
-        active_days=('active_days', 'first')
-    ).reset_index()
-    time_profile['global_daily_avg'] = (time_profile['grand_total'] / time_profile['active_days']).round(2)
-    time_profile['global_weekly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/7).replace(0,1)).round(2)
-    time_profile['global_monthly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/30).replace(0,1)).round(2)
-    time_profile['global_yearly_avg'] = (time_profile['grand_total'] / (time_profile['active_days']/365).replace(0,1)).round(2)
-    time_profile.to_sql('profile_timeline', engine, if_exists='replace', index=False)
-
-    # C. Device Profile
-    df['hour'] = df['timestamp'].dt.hour
-    df['time_of_day'] = df['hour'].apply(calculate_time_period)
-    dev_counts = df.groupby(['customer_id', 'device_id']).size().reset_index(name='count')
-    most_used = dev_counts.sort_values(['customer_id', 'count'], ascending=[True, False]).groupby('customer_id').head(1)
-    most_used.rename(columns={'device_id': 'favorite_device'}, inplace=True)
-    time_counts = df.pivot_table(index='customer_id', columns='time_of_day', values='transaction_id', aggfunc='count', fill_value=0).reset_index()
-    device_profile = pd.merge(most_used[['customer_id', 'favorite_device']], time_counts, on='customer_id')
-    device_profile.to_sql('profile_device_usage', engine, if_exists='replace', index=False)
+    ben_profile, time_profile, device_profile = profiles.build()
+    replace_table(ben_profile, 'profile_beneficiary')
+    replace_table(time_profile, 'profile_timeline')
+    replace_table(device_profile, 'profile_device_usage')
+
+    # Keys for the API's incremental upserts (profile_updater.py) and the concurrent view refresh
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE profile_beneficiary ADD PRIMARY KEY (customer_id, beneficiary_account)"))
+        conn.execute(text("ALTER TABLE profile_timeline ADD PRIMARY KEY (customer_id)"))
+        conn.execute(text("ALTER TABLE profile_device_usage ADD PRIMARY KEY (customer_id)"))
+        conn.execute(text("CREATE UNIQUE INDEX profile_customer_stats_pk ON profile_customer_stats (customer_id)"))
+        # Time-range pushdown for the Overview aggregations (overview_service.py)
+        conn.execute(text("CREATE INDEX transactions_timestamp_idx ON transactions (timestamp)"))
+        # Per-customer ranges and ledger pages, newest first (customer_service.py)
+        conn.execute(text("CREATE INDEX transactions_customer_ts_idx ON transactions (customer_id, timestamp DESC, transaction_id DESC)"))
+
+    # Hour/day/month buckets behind the Overview dashboard (kept current by rollups.RollupUpdater)
+    print("📈 Step 7: Building Dashboard Rollups...")
+    print(f"✅ {rebuild_rollups(engine)} rollup buckets.")
 
     print("\n🎉 DATA GENERATION COMPLETE.")
     print("=====================================================")
@@ -370,4 +483,10 @@ def master_setup():
     print("=====================================================")
 
 if __name__ == "__main__":
-    master_setup()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reset the database and generate the demo dataset")
+    parser.add_argument("--rows", type=int, default=NUM_TRANSACTIONS, help="transactions to generate")
+    parser.add_argument("--customers", type=int, default=NUM_CUSTOMERS, help="size of the general customer pool")
+    parser.add_argument("--workers", type=int, default=GEN_WORKERS, help="shard processes loading in parallel")
+    parser.add_argument("--seed", type=int, default=GEN_SEED, help="seed for a reproducible dataset")
+    args = parser.parse_args()
+    master_setup(rows=args.rows, customers=args.customers, workers=args.workers, seed=args.seed)
\ No newline at end of file
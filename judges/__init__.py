@@ -1,9 +1,25 @@
 # judges/__init__.py
 
-# Import the new professional classes from the new files
-from .pattern_model import PatternModel
-from .anomaly_model import AnomalyModel
-from .network_model import NetworkModel
+# Classes are imported on first access (PEP 562), so `import judges.graph_index`
+# doesn't drag in NumPy and the model loaders.
+_EXPORTS = {
+    "PatternModel": ".pattern_model",
+    "AnomalyModel": ".anomaly_model",
+    "NetworkModel": ".network_model",
+    "GraphIndex": ".graph_index",
+    "FanInCounter": ".window_counter",
+    "HyperLogLog": ".window_counter",
+    "CompiledForest": ".compiled_forest",
+    "CompiledIsolationForest": ".compiled_forest",
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # This allows you to do: from judges import PatternModel
-__all__ = ["PatternModel", "AnomalyModel", "NetworkModel"]
\ No newline at end of file
+__all__ = list(_EXPORTS)
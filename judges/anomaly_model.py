@@ -1,14 +1,18 @@
-import joblib
-import numpy as np
-import pandas as pd
+import os
+from .compiled_forest import CompiledIsolationForest
+from .model_artifacts import load_judge_model
 
 class AnomalyModel:
-    def __init__(self):
+    def __init__(self, compiled=None):
+        # Fast path: flat trees + precomputed path lengths; ANOMALY_COMPILED=0 keeps sklearn's decision_function
+        if compiled is None:
+            compiled = os.getenv("ANOMALY_COMPILED", "1").lower() in ("1", "true", "yes")
         try:
-            # Loads the Isolation Forest
-            self.pipeline = joblib.load('judges/models/iso_anomaly.pkl')
+            # Loads the Isolation Forest (mmapped artifact judges/models/iso_anomaly/, else iso_anomaly.pkl)
+            self.pipeline, self.compiled = load_judge_model(CompiledIsolationForest, 'iso_anomaly', compiled)
             self.model_loaded = True
         except:
+            self.pipeline = self.compiled = None
             self.model_loaded = False
             print("⚠️ Anomaly Model (IsoForest) missing.")
 
@@ -16,17 +20,42 @@ class AnomalyModel:
         """
         Role: Unsupervised Anomaly Detection (Isolation Forest)
         """
-        feature_names = ['amount', 'opex_ratio', 'users_on_device', 'account_age_days']
-        X_input = pd.DataFrame([features], columns=feature_names)
-        
+        return self.assess_batch([features])[0]
+
+    def assess_batch(self, feature_rows):
+        """
+        Role: Vectorized Isolation Forest scoring for many transactions at once
+        Output: list of (risk_score, verdict), same order as the input
+        """
+        # The shell rule overrides the model, so those rows are never scored
+        to_score = [i for i, features in enumerate(feature_rows) if not self._is_shell(features)]
+        raw_scores = [None] * len(feature_rows)
+
+        # 1. STATISTICAL OUTLIER DETECTION (one decision_function call for the whole matrix)
+        if self.model_loaded and to_score:
+            rows = [feature_rows[i] for i in to_score]
+            if self.compiled is not None:
+                scored = self.compiled.decision_function(rows)
+            else:
+                import pandas as pd  # only the sklearn path needs DataFrames
+                feature_names = ['amount', 'opex_ratio', 'users_on_device', 'account_age_days']
+                # decision_function: Negative values are anomalies
+                scored = self.pipeline.decision_function(pd.DataFrame(rows, columns=feature_names))
+            for i, raw_score in zip(to_score, scored):
+                raw_scores[i] = raw_score
+
+        return [self._apply_rules(raw_score, features) for raw_score, features in zip(raw_scores, feature_rows)]
+
+    @staticmethod
+    def _is_shell(features):
+        # High Revenue + Zero Operational Expenses
+        return features[0] > 100000 and features[1] < 0.01
+
+    def _apply_rules(self, raw_score, features):
         risk_score = 0.0
         verdict = "Normal Pulse"
 
-        # 1. STATISTICAL OUTLIER DETECTION
-        if self.model_loaded:
-            # decision_function: Negative values are anomalies
-            raw_score = self.pipeline.decision_function(X_input)[0]
-            
+        if raw_score is not None:
             if raw_score < -0.15:
                 risk_score = 1.0
                 verdict = "Statistical Outlier"
@@ -35,12 +64,8 @@ class AnomalyModel:
                 verdict = "Deviating Behavior"
 
         # 2. SHELL COMPANY LOGIC (Deterministic)
-        # High Revenue + Zero Operational Expenses
-        amount = features[0]
-        opex_ratio = features[1]
-        
-        if amount > 100000 and opex_ratio < 0.01:
+        if self._is_shell(features):
             risk_score = 1.0
             verdict = "🚨 SHELL DETECTED (Zero OpEx)"
 
-        return risk_score, verdict
\ No newline at end of file
+        return risk_score, verdict
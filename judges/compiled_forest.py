@@ -0,0 +1,225 @@
+import os
+import json
+import numpy as np
+
+# Versioned on-disk format: <dir>/manifest.json + one uncompressed .npy per array
+ARTIFACT_FORMAT = "finsentinel-forest"
+ARTIFACT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def _scaler_affine(transforms, n_features):
+    """Fold a chain of StandardScalers into one (mean, scale) map."""
+    mean = np.zeros(n_features)
+    scale = np.ones(n_features)
+    for t in transforms:
+        if type(t).__name__ != "StandardScaler":
+            raise ValueError(f"Cannot compile pipeline step {type(t).__name__}")
+        t_mean = t.mean_ if t.mean_ is not None else 0.0
+        t_scale = t.scale_ if t.scale_ is not None else 1.0
+        mean = mean + t_mean * scale
+        scale = scale * t_scale
+    return mean, scale
+
+
+def _split_pipeline(pipeline):
+    steps = [step for _, step in pipeline.steps] if hasattr(pipeline, "steps") else [pipeline]
+    *transforms, forest = steps
+    names = getattr(pipeline, "feature_names_in_", None)
+    feature_names = [str(n) for n in names] if names is not None else None
+    return _scaler_affine(transforms, forest.n_features_in_), forest, feature_names
+
+
+def _pack_trees(estimators, features_per_tree=None):
+    """
+    Every tree packed into shared arrays (feature, threshold, left, right, roots).
+    Leaves point to themselves, so walking max_depth steps lands every row on its leaf.
+    """
+    features, thresholds, lefts, rights, roots = [], [], [], [], []
+    offset = 0
+    for i, est in enumerate(estimators):
+        tree = est.tree_
+        n = tree.node_count
+        own = np.arange(n) + offset
+        leaf = tree.children_left == -1
+        feature = np.where(leaf, 0, tree.feature)
+        if features_per_tree is not None:
+            # Bagged ensembles may train each tree on a subset/permutation of the columns
+            feature = np.asarray(features_per_tree[i])[feature]
+        features.append(feature)
+        thresholds.append(np.where(leaf, 0.0, tree.threshold))
+        lefts.append(np.where(leaf, own, tree.children_left + offset))
+        rights.append(np.where(leaf, own, tree.children_right + offset))
+        roots.append(offset)
+        offset += n
+
+    arrays = {
+        "feature": np.concatenate(features).astype(np.int64),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int64),
+        "right": np.concatenate(rights).astype(np.int64),
+        "roots": np.asarray(roots, dtype=np.int64),
+    }
+    return arrays, max(est.tree_.max_depth for est in estimators)
+
+
+def average_path_length(n_samples):
+    """c(n): expected path length of an unsuccessful BST search over n points (IsolationForest normalizer)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+class _FlatTrees:
+    """
+    Tree ensemble as flat NumPy arrays, scored for all trees at once:
+    no DataFrame, no sklearn input validation, no joblib dispatch.
+    Arrays can come from a fitted pipeline or from a memory-mapped artifact directory.
+    """
+    kind = None
+    array_names = ("feature", "threshold", "left", "right", "roots")
+    param_names = ("max_depth",)
+
+    def __init__(self, mean, scale, arrays, params, feature_names=None):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.feature_names = feature_names
+        for name in self.array_names:
+            setattr(self, name, arrays[name])
+        for name in self.param_names:
+            setattr(self, name, params[name])
+
+    def leaves(self, X):
+        """X: (n_rows, n_features) -> (n_rows, n_trees) global leaf index per tree."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.mean.shape[0])
+        # sklearn trees compare float32 inputs against float64 thresholds
+        Xs = ((X - self.mean) / self.scale).astype(np.float32).astype(np.float64)
+
+        rows = np.arange(Xs.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (Xs.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = Xs[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    # --- Artifact format ---
+
+    def save(self, path, **metadata):
+        """Write <path>/manifest.json + <array>.npy (uncompressed, so they can be mmapped)."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {}
+        for name in self.array_names:
+            array = np.ascontiguousarray(getattr(self, name))
+            np.save(os.path.join(path, f"{name}.npy"), array, allow_pickle=False)
+            arrays[name] = {"file": f"{name}.npy", "dtype": str(array.dtype), "shape": list(array.shape)}
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "kind": self.kind,
+            "feature_names": self.feature_names,
+            "scaler": {"mean": self.mean.tolist(), "scale": self.scale.tolist()},
+            "params": {name: _to_json(getattr(self, name)) for name in self.param_names},
+            "arrays": arrays,
+            "metadata": metadata,
+        }
+        # Manifest last: a directory without one is never picked up as an artifact
+        tmp = os.path.join(path, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Open an artifact directory; arrays are memory-mapped (shared through the page cache)."""
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("kind") != cls.kind:
+            raise ValueError(f"{path} is not a {cls.kind} artifact")
+        if manifest.get("version", 0) > ARTIFACT_VERSION:
+            raise ValueError(f"{path}: artifact version {manifest['version']} is newer than supported ({ARTIFACT_VERSION})")
+        arrays = {}
+        for name in cls.array_names:
+            spec = manifest["arrays"][name]
+            arrays[name] = np.load(os.path.join(path, spec["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+            if list(arrays[name].shape) != spec["shape"]:
+                raise ValueError(f"{path}: {spec['file']} does not match the manifest")
+        return cls(manifest["scaler"]["mean"], manifest["scaler"]["scale"], arrays, manifest["params"],
+                   manifest.get("feature_names"))
+
+
+class CompiledForest(_FlatTrees):
+    """
+    Flat NumPy copy of a fitted Pipeline([StandardScaler, RandomForestClassifier]).
+    Output matches pipeline.predict_proba to float tolerance.
+    """
+    kind = "random_forest"
+    array_names = _FlatTrees.array_names + ("value",)   # value: per-tree class fractions per node
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        (mean, scale), forest, feature_names = _split_pipeline(pipeline)
+        arrays, max_depth = _pack_trees(forest.estimators_)
+        values = []
+        for est in forest.estimators_:
+            val = est.tree_.value[:, 0, :]
+            values.append(val / val.sum(axis=1, keepdims=True))
+        arrays["value"] = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        return cls(mean, scale, arrays, {"max_depth": max_depth}, feature_names)
+
+    def predict_proba(self, X):
+        """X: (n_rows, n_features) array-like -> (n_rows, n_classes), like sklearn."""
+        return self.value[self.leaves(X)].mean(axis=1)
+
+    def predict_fraud(self, X):
+        """Probability of class 1 (fraud) for each row."""
+        return self.predict_proba(X)[:, 1]
+
+
+class CompiledIsolationForest(_FlatTrees):
+    """
+    Flat NumPy copy of a fitted Pipeline([StandardScaler, IsolationForest]).
+    Each leaf stores its full path length (depth + c(samples left in the leaf)), precomputed,
+    so a score is one gather + mean. Output matches pipeline.decision_function to float tolerance.
+    """
+    kind = "isolation_forest"
+    array_names = _FlatTrees.array_names + ("path_length",)
+    param_names = _FlatTrees.param_names + ("normalizer", "offset")
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        (mean, scale), forest, feature_names = _split_pipeline(pipeline)
+        arrays, max_depth = _pack_trees(forest.estimators_, forest.estimators_features_)
+        path_lengths = []
+        for est in forest.estimators_:
+            tree = est.tree_
+            depth = np.zeros(tree.node_count)
+            for node in range(tree.node_count):  # parents always precede children
+                for child in (tree.children_left[node], tree.children_right[node]):
+                    if child != -1:
+                        depth[child] = depth[node] + 1
+            path_lengths.append(depth + average_path_length(tree.n_node_samples))
+        arrays["path_length"] = np.concatenate(path_lengths)
+        params = {
+            "max_depth": max_depth,
+            "normalizer": len(forest.estimators_) * float(average_path_length([forest.max_samples_])[0]),
+            "offset": float(forest.offset_),
+        }
+        return cls(mean, scale, arrays, params, feature_names)
+
+    def score_samples(self, X):
+        return -np.power(2.0, -self.path_length[self.leaves(X)].sum(axis=1) / self.normalizer)
+
+    def decision_function(self, X):
+        """Negative values are anomalies (same convention as sklearn)."""
+        return self.score_samples(X) - self.offset
+
+
+def _to_json(value):
+    return value.item() if isinstance(value, np.generic) else value
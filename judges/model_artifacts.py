@@ -0,0 +1,105 @@
+"""
+Model artifacts for the ML judges.
+
+    judges/models/rf_pattern/      manifest.json + *.npy   (preferred: mmapped, near-instant load)
+    judges/models/rf_pattern.pkl   joblib pickle           (still supported, compiled at load)
+
+Convert the pickles in judges/models/ to artifacts (again after replacing a pickle):
+    python -m judges.model_artifacts
+
+An artifact records the size and sha256 of the pickle it was exported from; if <name>.pkl has
+changed since, the artifact is stale and ignored (with a warning) until it is re-exported.
+"""
+import os
+import sys
+import json
+import hashlib
+from .compiled_forest import CompiledForest, CompiledIsolationForest, is_artifact, MANIFEST
+
+MODEL_DIR = 'judges/models'
+
+
+def load_judge_model(compiled_cls, name, compiled=True):
+    """
+    -> (pipeline, compiled_model) for judges/models/<name>.
+    compiled=True prefers the mmapped artifact and only unpickles when there is none;
+    compiled=False (sklearn scoring) always loads the pickle.
+    Either may be None; raises if neither could be loaded.
+    """
+    artifact_path = os.path.join(MODEL_DIR, name)
+    pickle_path = artifact_path + '.pkl'
+    errors = []
+
+    if compiled and is_artifact(artifact_path) and not _is_stale(artifact_path, pickle_path):
+        try:
+            return None, compiled_cls.load(artifact_path, mmap_mode='r')
+        except Exception as e:
+            errors.append(f"{artifact_path}: {e}")
+
+    import joblib  # pickles pull in sklearn; artifacts don't need either
+    try:
+        pipeline = joblib.load(pickle_path)
+    except Exception as e:
+        errors.append(f"{pickle_path}: {e}")
+        raise FileNotFoundError("; ".join(errors))
+
+    compiled_model = None
+    if compiled:
+        try:
+            compiled_model = compiled_cls.from_pipeline(pipeline)
+        except Exception as e:
+            print(f"⚠️ {name}: compiled scorer unavailable, using sklearn. {e}")
+    return pipeline, compiled_model
+
+
+def export_pipeline(pipeline, compiled_cls, path, **metadata):
+    """Fitted sklearn pipeline -> artifact directory."""
+    import sklearn
+    metadata.setdefault('sklearn_version', sklearn.__version__)
+    compiled_cls.from_pipeline(pipeline).save(path, **metadata)
+    return path
+
+
+def export_all(model_dir=MODEL_DIR):
+    import joblib
+    for name, compiled_cls in (('rf_pattern', CompiledForest), ('iso_anomaly', CompiledIsolationForest)):
+        pickle_path = os.path.join(model_dir, name + '.pkl')
+        if not os.path.exists(pickle_path):
+            print(f"⏭️ {pickle_path} not found, skipped")
+            continue
+        path = export_pipeline(joblib.load(pickle_path), compiled_cls, os.path.join(model_dir, name), source=name + '.pkl',
+                               source_size=os.path.getsize(pickle_path), source_sha256=_sha256(pickle_path))
+        print(f"✅ {pickle_path} -> {path}/")
+
+
+def _is_stale(artifact_path, pickle_path):
+    """True (and warns) if the pickle next to the artifact is not the one it was exported from."""
+    if not os.path.exists(pickle_path):
+        return False
+    manifest_path = os.path.join(artifact_path, MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            source = json.load(f).get("metadata", {})
+    except (OSError, ValueError):
+        return False  # unreadable manifest: compiled_cls.load reports it
+    if "source_sha256" in source:
+        stale = (source.get("source_size") != os.path.getsize(pickle_path)
+                 or source["source_sha256"] != _sha256(pickle_path))
+    else:
+        # Exported without a fingerprint: a pickle written after the manifest replaced it
+        stale = os.path.getmtime(pickle_path) > os.path.getmtime(manifest_path)
+    if stale:
+        print(f"⚠️ {artifact_path}: artifact is stale ({os.path.basename(pickle_path)} changed since export), "
+              f"loading the pickle. Re-run: python -m judges.model_artifacts")
+    return stale
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    export_all(*sys.argv[1:])
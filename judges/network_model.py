@@ -1,64 +1,120 @@
-import pandas as pd
-from sqlalchemy import create_engine, text
+import os
+import asyncio
+from database import get_engine
+from query_registry import register
+from .graph_index import GraphIndex
+
+# The three topology checks as registered statements (bound parameters, prepared, timed)
+Q_SYN = register("network_device_users", "SELECT COUNT(DISTINCT customer_id) FROM transactions WHERE device_id = :device_id")
+Q_MULE = register("network_fan_in", """
+    SELECT COUNT(DISTINCT customer_id) FROM transactions
+    WHERE beneficiary_account = :beneficiary_account AND timestamp > NOW() - INTERVAL '24 HOURS'
+""")
+Q_LOOP = register("network_direct_loop", """
+    SELECT COUNT(*) FROM transactions
+    WHERE customer_account_number = :beneficiary_account
+    AND beneficiary_account IN (SELECT customer_account_number FROM transactions WHERE customer_id = :customer_id)
+""")
 
 class NetworkModel:
-    def __init__(self, db_conn):
-        self.engine = create_engine(db_conn)
-    
+    def __init__(self, db_conn, graph_index=None, use_sql=None, async_engine=None):
+        # Shared process-wide pool (same engine as the API when the URL matches)
+        self.engine = get_engine(db_conn)
+        # Optional AsyncEngine: lets investigate_async run the SQL checks concurrently
+        self.async_engine = async_engine
+        # In-memory adjacency index; the API builds it at startup and feeds it every INSERT
+        self.graph_index = graph_index if graph_index is not None else GraphIndex()
+        # Verification flag: NETWORK_USE_SQL=1 forces the original SQL scans
+        if use_sql is None:
+            use_sql = os.getenv("NETWORK_USE_SQL", "0").lower() in ("1", "true", "yes")
+        self.use_sql = use_sql
+
     def investigate(self, device_id, customer_id, beneficiary_account, amount):
         """
         Role: Graph Topology Analysis (GNN Logic)
         Checks: Mules (Star), Laundering (Cycles), Synthetic (Bipartite)
         """
-        risk_score = 0.0
-        reasons = []
-        
-        # 1. SYNTHETIC IDENTITY (Device Collisions)
-        try:
-            q_syn = f"SELECT COUNT(DISTINCT customer_id) FROM transactions WHERE device_id = '{device_id}'"
-            user_count = pd.read_sql(q_syn, self.engine).iloc[0, 0]
-            
-            if user_count > 3:
-                risk_score += 1.0
-                reasons.append(f"Device Collision: {user_count} identities on device '{device_id}'")
-        except Exception as e:
-            print(f"Network Error (Syn): {e}")
+        if self.use_sql or not self.graph_index.is_warm:
+            return self.investigate_sql(device_id, customer_id, beneficiary_account, amount)
 
-        # 2. MONEY MULE (Star Topology / High Fan-In)
-        try:
-            q_mule = f"""
-                SELECT COUNT(DISTINCT customer_id) 
-                FROM transactions 
-                WHERE beneficiary_account = '{beneficiary_account}' 
-                AND timestamp > NOW() - INTERVAL '24 HOURS'
-            """
-            fan_in_count = pd.read_sql(q_mule, self.engine).iloc[0, 0]
-            
-            if fan_in_count >= 5:
-                risk_score += 1.0
-                reasons.append(f"Mule Node: '{beneficiary_account}' receiving from {fan_in_count} sources")
-        except Exception as e:
-            print(f"Network Error (Mule): {e}")
+        user_count = self.graph_index.users_on_device(device_id)
+        fan_in_count = self.graph_index.fan_in_count(beneficiary_account, '24h')
+        direct_loop = self.graph_index.direct_loops(customer_id, beneficiary_account)
+        return self._verdict(device_id, beneficiary_account, user_count, fan_in_count, direct_loop)
+
+    async def investigate_async(self, device_id, customer_id, beneficiary_account, amount):
+        """
+        Non-blocking investigate(): index lookups when warm, otherwise the three
+        SQL checks run concurrently on the async engine.
+        """
+        if not self.use_sql and self.graph_index.is_warm:
+            return self.investigate(device_id, customer_id, beneficiary_account, amount)
+        if self.async_engine is None:
+            return await asyncio.to_thread(self.investigate_sql, device_id, customer_id, beneficiary_account, amount)
+
+        user_count, fan_in_count, direct_loop = await asyncio.gather(
+            self._scalar_async(Q_SYN, {"device_id": device_id}, "Syn"),
+            self._scalar_async(Q_MULE, {"beneficiary_account": beneficiary_account}, "Mule"),
+            self._scalar_async(Q_LOOP, {"beneficiary_account": beneficiary_account, "customer_id": customer_id}),
+        )
+        return self._verdict(device_id, beneficiary_account, user_count, fan_in_count, direct_loop)
 
-        # 3. CIRCULAR TRADING (Graph Cycles)
+    async def _scalar_async(self, query, params, label=None):
         try:
-            # Check A -> B -> A
-            q_loop = f"""
-                SELECT COUNT(*) FROM transactions 
-                WHERE customer_account_number = '{beneficiary_account}' 
-                AND beneficiary_account = (SELECT customer_account_number FROM customers WHERE customer_id = {customer_id})
-            """
-            direct_loop = pd.read_sql(q_loop, self.engine).iloc[0, 0]
-            
-            if direct_loop > 0:
-                risk_score += 1.0
-                reasons.append("Cycle Detected: A->B->A Loop")
+            async with self.async_engine.connect() as conn:
+                return (await query.execute_async(conn, params)).scalar()
         except Exception as e:
-            pass
+            if label: print(f"Network Error ({label}): {e}")
+            return None
+
+    def investigate_sql(self, device_id, customer_id, beneficiary_account, amount):
+        """Original path: three scans of `transactions` per call (kept for verification)."""
+        user_count = fan_in_count = direct_loop = None
+
+        with self.engine.connect() as conn:
+            # 1. SYNTHETIC IDENTITY (Device Collisions)
+            try:
+                user_count = Q_SYN.execute(conn, {"device_id": device_id}).scalar()
+            except Exception as e:
+                conn.rollback()
+                print(f"Network Error (Syn): {e}")
+
+            # 2. MONEY MULE (Star Topology / High Fan-In)
+            try:
+                fan_in_count = Q_MULE.execute(conn, {"beneficiary_account": beneficiary_account}).scalar()
+            except Exception as e:
+                conn.rollback()
+                print(f"Network Error (Mule): {e}")
+
+            # 3. CIRCULAR TRADING (Graph Cycles)
+            try:
+                # Check A -> B -> A
+                # (customers has no account column, A's accounts come from its own transactions)
+                direct_loop = Q_LOOP.execute(conn, {"beneficiary_account": beneficiary_account, "customer_id": customer_id}).scalar()
+            except Exception as e:
+                pass
+
+        return self._verdict(device_id, beneficiary_account, user_count, fan_in_count, direct_loop)
+
+    def _verdict(self, device_id, beneficiary_account, user_count, fan_in_count, direct_loop):
+        risk_score = 0.0
+        reasons = []
+
+        if user_count is not None and user_count > 3:
+            risk_score += 1.0
+            reasons.append(f"Device Collision: {user_count} identities on device '{device_id}'")
+
+        if fan_in_count is not None and fan_in_count >= 5:
+            risk_score += 1.0
+            reasons.append(f"Mule Node: '{beneficiary_account}' receiving from {fan_in_count} sources")
+
+        if direct_loop is not None and direct_loop > 0:
+            risk_score += 1.0
+            reasons.append("Cycle Detected: A->B->A Loop")
 
         verdict = "Clean"
         if risk_score > 0:
             verdict = "Network Topology Risk"
             risk_score = 1.0
-            
-        return risk_score, verdict, reasons
\ No newline at end of file
+
+        return risk_score, verdict, reasons
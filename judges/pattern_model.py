@@ -1,14 +1,18 @@
-import joblib
-import numpy as np
-import pandas as pd
+import os
+from .compiled_forest import CompiledForest
+from .model_artifacts import load_judge_model
 
 class PatternModel:
-    def __init__(self):
+    def __init__(self, compiled=None):
+        # Flat-array scorer for low-latency calls; PATTERN_COMPILED=0 keeps sklearn's predict_proba
+        if compiled is None:
+            compiled = os.getenv("PATTERN_COMPILED", "1").lower() in ("1", "true", "yes")
         try:
-            # Loads the Random Forest Pipeline
-            self.pipeline = joblib.load('judges/models/rf_pattern.pkl')
+            # Loads the Random Forest (mmapped artifact judges/models/rf_pattern/, else rf_pattern.pkl)
+            self.pipeline, self.compiled = load_judge_model(CompiledForest, 'rf_pattern', compiled)
             self.model_loaded = True
         except Exception as e:
+            self.pipeline = self.compiled = None
             self.model_loaded = False
             print(f"⚠️ Pattern Model (RF) missing: {e}")
 
@@ -17,16 +21,29 @@ class PatternModel:
         Role: Supervised Learning (Random Forest)
         Input: [amount, opex_ratio, users_on_device, account_age_days]
         """
-        feature_names = ['amount', 'opex_ratio', 'users_on_device', 'account_age_days']
-        X_input = pd.DataFrame([features], columns=feature_names)
-        
-        ml_score = 0.0
-        
-        # 1. ML PREDICTION
-        if self.model_loaded:
+        return self.assess_batch([features])[0]
+
+    def assess_batch(self, feature_rows):
+        """
+        Role: Vectorized Random Forest scoring for many transactions at once
+        Input: list of [amount, opex_ratio, users_on_device, account_age_days]
+        Output: list of (score, verdict), same order as the input
+        """
+        # 1. ML PREDICTION (one predict_proba call for the whole matrix)
+        if self.compiled is not None and len(feature_rows) > 0:
+            ml_scores = self.compiled.predict_fraud(feature_rows)
+        elif self.model_loaded and len(feature_rows) > 0:
+            import pandas as pd  # only the sklearn path needs DataFrames
+            feature_names = ['amount', 'opex_ratio', 'users_on_device', 'account_age_days']
+            X_input = pd.DataFrame(feature_rows, columns=feature_names)
             # Get probability of Fraud (Class 1)
-            ml_score = self.pipeline.predict_proba(X_input)[0][1]
+            ml_scores = self.pipeline.predict_proba(X_input)[:, 1]
+        else:
+            ml_scores = [0.0] * len(feature_rows)
         
+        return [self._apply_rules(ml_score, features) for ml_score, features in zip(ml_scores, feature_rows)]
+
+    def _apply_rules(self, ml_score, features):
         # 2. HEURISTIC RULES (Expert Systems)
         amount = features[0]
         account_age = features[3]
@@ -45,4 +62,4 @@ class PatternModel:
         if final_score > 0.75: verdict = "High Risk Pattern"
         elif final_score > 0.4: verdict = "Suspicious Activity"
         
-        return final_score, verdict
\ No newline at end of file
+        return final_score, verdict
@@ -0,0 +1,113 @@
+"""
+Aggregations behind the Overview dashboard (Pages/1_Overview.py). Every filter combination is
+(city, granularity, period):
+  - KPIs, fraud-type distribution and the trend come from the txn_rollups buckets
+    (rollups.py) of the period's grain: at most a few hundred pre-aggregated rows
+  - the incident log and watchlist are top-N queries on `transactions` (city + time range
+    pushed down), so only the rows shown ever leave Postgres
+
+    summary = overview(engine, city="Mumbai", granularity="Monthly", year=2025, month=3)
+"""
+from datetime import date, datetime, timedelta
+from query_registry import register
+from rollups import bucket_id, bucket_label
+from fraud_types import fraud_name
+
+GRANULARITIES = ('All Time', 'Yearly', 'Quarterly', 'Monthly', 'Daily')
+
+# Granularity -> rollup grain of the "Txn Flow" trend (the KPIs sum the same buckets)
+TREND_GRAIN = {'All Time': 'month', 'Yearly': 'month', 'Quarterly': 'month', 'Monthly': 'day', 'Daily': 'hour'}
+
+INCIDENT_LIMIT = 10
+WATCHLIST_LIMIT = 5
+
+# NULL city = all cities
+_CITY = "(CAST(:city AS VARCHAR) IS NULL OR city = :city)"
+
+Q_CITIES = register("overview_cities", """
+    SELECT DISTINCT city FROM txn_rollups WHERE grain = 'month' AND city <> '' ORDER BY city
+""")
+Q_YEARS = register("overview_years", f"""
+    SELECT DISTINCT bucket_id / 12 AS year FROM txn_rollups
+    WHERE grain = 'month' AND {_CITY}
+    ORDER BY year DESC
+""")
+Q_ROLLUP = register("overview_rollup", f"""
+    SELECT bucket_id, fraud_code, SUM(txns) AS txns, SUM(volume) AS volume, SUM(alerts) AS alerts, SUM(saved) AS saved
+    FROM txn_rollups
+    WHERE grain = :grain AND bucket_id >= :first AND bucket_id < :stop AND {_CITY}
+    GROUP BY bucket_id, fraud_code
+""")
+# Raw rows for the tables; the period is a half-open [start, end) range on timestamp
+_WHERE = f"{_CITY} AND timestamp >= :start AND timestamp < :end"
+Q_INCIDENTS = register("overview_incidents", f"""
+    SELECT timestamp, customer_id, customer_name, amount, fraud_type, fraud_code, city
+    FROM transactions WHERE is_fraud = 1 AND {_WHERE}
+    ORDER BY timestamp DESC LIMIT :limit
+""")
+Q_WATCHLIST = register("overview_watchlist", f"""
+    SELECT customer_id, customer_name, amount, fraud_type, fraud_code
+    FROM transactions WHERE is_fraud = 1 AND {_WHERE}
+    ORDER BY amount DESC LIMIT :limit
+""")
+
+
+def period_bounds(granularity, year=None, quarter=None, month=None, day=None):
+    """Filter selection -> [start, end) timestamps ('All Time' is unbounded)."""
+    if granularity == 'Yearly':
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    if granularity == 'Quarterly':
+        first = 3 * (quarter - 1) + 1
+        return datetime(year, first, 1), (datetime(year, first + 3, 1) if quarter < 4 else datetime(year + 1, 1, 1))
+    if granularity == 'Monthly':
+        return datetime(year, month, 1), (datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1))
+    if granularity == 'Daily':
+        start = datetime.combine(day or date.today(), datetime.min.time())
+        return start, start + timedelta(days=1)
+    return datetime.min, datetime.max
+
+
+def filter_options(engine, city=None):
+    """Values for the City / Year pickers."""
+    with engine.connect() as conn:
+        cities = [row[0] for row in Q_CITIES.execute(conn)]
+        years = [row[0] for row in Q_YEARS.execute(conn, {"city": city})]
+    return {"cities": cities, "years": years}
+
+
+def overview(engine, city=None, granularity='All Time', year=None, quarter=None, month=None, day=None):
+    """
+    Everything the Overview page renders for one filter combination:
+      kpis         {transactions, volume, alerts, saved}
+      fraud_types  {canonical crime type name: alerts} (fraud_types.py)
+      trend        [{label, count}] in time order, one point per TREND_GRAIN[granularity] bucket
+      incidents    latest INCIDENT_LIMIT fraud rows; watchlist: top WATCHLIST_LIMIT by amount
+    """
+    start, end = period_bounds(granularity, year, quarter, month, day)
+    grain = TREND_GRAIN[granularity]
+    where = {"city": city, "start": start, "end": end}
+
+    with engine.connect() as conn:
+        buckets = Q_ROLLUP.execute(conn, {"city": city, "grain": grain,
+                                          "first": bucket_id(grain, start), "stop": bucket_id(grain, end)}).fetchall()
+        incidents = [dict(row) for row in Q_INCIDENTS.execute(conn, {**where, "limit": INCIDENT_LIMIT}).mappings()]
+        watchlist = [dict(row) for row in Q_WATCHLIST.execute(conn, {**where, "limit": WATCHLIST_LIMIT}).mappings()]
+
+    kpis = {"transactions": 0, "volume": 0.0, "alerts": 0, "saved": 0.0}
+    fraud_types, trend = {}, {}
+    for bucket, code, txns, volume, alerts, saved in buckets:
+        kpis["transactions"] += int(txns)
+        kpis["volume"] += float(volume)
+        kpis["alerts"] += int(alerts)
+        kpis["saved"] += float(saved)
+        if alerts:
+            fraud_types[fraud_name(code)] = fraud_types.get(fraud_name(code), 0) + int(alerts)
+        trend[bucket] = trend.get(bucket, 0) + int(txns)
+
+    return {
+        "kpis": kpis,
+        "fraud_types": fraud_types,
+        "trend": [{"label": bucket_label(grain, b), "count": trend[b]} for b in sorted(trend)],
+        "incidents": incidents,
+        "watchlist": watchlist,
+    }
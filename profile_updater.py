@@ -0,0 +1,282 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from sqlalchemy import text
+from judges.graph_index import to_datetime
+
+PERIODS = ('Morning', 'Afternoon', 'Evening', 'Night')
+
+# Additive part of each profile: new rows only add to the sums/counts/first/last
+Q_UPSERT_TIMELINE = text("""
+    INSERT INTO profile_timeline (customer_id, first_txn, last_txn, grand_total)
+    SELECT * FROM unnest(CAST(:customer_ids AS bigint[]), CAST(:firsts AS timestamp[]),
+                         CAST(:lasts AS timestamp[]), CAST(:totals AS float8[]))
+    ON CONFLICT (customer_id) DO UPDATE SET
+        first_txn = LEAST(profile_timeline.first_txn, EXCLUDED.first_txn),
+        last_txn = GREATEST(profile_timeline.last_txn, EXCLUDED.last_txn),
+        grand_total = profile_timeline.grand_total + EXCLUDED.grand_total
+""")
+Q_UPSERT_BENEFICIARY = text("""
+    INSERT INTO profile_beneficiary (customer_id, beneficiary_account, total_amount, txn_count)
+    SELECT * FROM unnest(CAST(:customer_ids AS bigint[]), CAST(:beneficiaries AS text[]),
+                         CAST(:totals AS float8[]), CAST(:counts AS bigint[]))
+    ON CONFLICT (customer_id, beneficiary_account) DO UPDATE SET
+        total_amount = profile_beneficiary.total_amount + EXCLUDED.total_amount,
+        txn_count = profile_beneficiary.txn_count + EXCLUDED.txn_count
+""")
+Q_UPSERT_DEVICE = text("""
+    INSERT INTO profile_device_usage (customer_id, favorite_device, "Morning", "Afternoon", "Evening", "Night")
+    SELECT * FROM unnest(CAST(:customer_ids AS bigint[]), CAST(:favorites AS text[]),
+                         CAST(:morning AS bigint[]), CAST(:afternoon AS bigint[]),
+                         CAST(:evening AS bigint[]), CAST(:night AS bigint[]))
+    ON CONFLICT (customer_id) DO UPDATE SET
+        favorite_device = COALESCE(EXCLUDED.favorite_device, profile_device_usage.favorite_device),
+        "Morning" = profile_device_usage."Morning" + EXCLUDED."Morning",
+        "Afternoon" = profile_device_usage."Afternoon" + EXCLUDED."Afternoon",
+        "Evening" = profile_device_usage."Evening" + EXCLUDED."Evening",
+        "Night" = profile_device_usage."Night" + EXCLUDED."Night"
+""")
+# Derived part (same formulas as generate_data.ProfileBuilder), recomputed for the touched customers
+Q_DERIVE_TIMELINE = text("""
+    UPDATE profile_timeline SET
+        active_days = d.days,
+        global_daily_avg = ROUND(CAST(grand_total / d.days AS numeric), 2),
+        global_weekly_avg = ROUND(CAST(grand_total / (d.days / 7.0) AS numeric), 2),
+        global_monthly_avg = ROUND(CAST(grand_total / (d.days / 30.0) AS numeric), 2),
+        global_yearly_avg = ROUND(CAST(grand_total / (d.days / 365.0) AS numeric), 2)
+    FROM (SELECT customer_id, GREATEST(EXTRACT(DAY FROM last_txn - first_txn)::int, 1) AS days
+          FROM profile_timeline WHERE customer_id = ANY(CAST(:customer_ids AS bigint[]))) d
+    WHERE profile_timeline.customer_id = d.customer_id
+""")
+Q_DERIVE_BENEFICIARY = text("""
+    UPDATE profile_beneficiary b SET
+        active_days = t.active_days,
+        daily_avg = ROUND(CAST(b.total_amount / t.active_days AS numeric), 2),
+        weekly_avg = ROUND(CAST(b.total_amount / (t.active_days / 7.0) AS numeric), 2),
+        monthly_avg = ROUND(CAST(b.total_amount / (t.active_days / 30.0) AS numeric), 2),
+        yearly_avg = ROUND(CAST(b.total_amount / (t.active_days / 365.0) AS numeric), 2)
+    FROM profile_timeline t
+    WHERE b.customer_id = t.customer_id AND b.customer_id = ANY(CAST(:customer_ids AS bigint[]))
+""")
+Q_DEVICE_COUNTS = text("SELECT customer_id, device_id, COUNT(*) FROM transactions WHERE device_id IS NOT NULL GROUP BY 1, 2")
+# One worker refreshes at a time (serve.py runs several updaters against the same view)
+Q_REFRESH_LOCK = text("SELECT pg_try_advisory_xact_lock(hashtext('profile_customer_stats'))")
+Q_REFRESH_STATS = text("REFRESH MATERIALIZED VIEW CONCURRENTLY profile_customer_stats")
+
+
+class ProfileUpdater:
+    """
+    Keeps the generate_data.py profile tables current as the API logs transactions.
+    An online store (warm(engine) / record(row)): each logged row is folded into small
+    in-memory deltas, and a background thread flushes them every `flush_interval` seconds:
+      - UPSERT of the additive columns (totals, counts, first/last txn, time-of-day counts)
+      - the averages / active_days are recomputed in SQL for the touched customers only
+      - favorite_device comes from per-customer device counts, warmed once from `transactions`
+    Every `refresh_interval` seconds (if anything was flushed) profile_customer_stats is
+    refreshed with REFRESH MATERIALIZED VIEW CONCURRENTLY, so readers are never blocked.
+    A failed flush keeps its deltas for the next attempt.
+    """
+
+    def __init__(self, engine, flush_interval=5.0, refresh_interval=300.0):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.device_counts = defaultdict(lambda: defaultdict(int))  # customer_id -> device_id -> txns
+        self._reset_deltas()
+        self.is_warm = False
+        self.stale_stats = False
+        self.last_refresh = time.monotonic()
+        self.last_flush = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.counters = {"recorded": 0, "flushes": 0, "flushed_rows": 0, "refreshes": 0, "errors": 0}
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, engine):
+        return cls(
+            engine,
+            flush_interval=float(os.getenv("PROFILE_FLUSH_SECONDS", "5")),
+            refresh_interval=float(os.getenv("PROFILE_REFRESH_SECONDS", "300")),
+        )
+
+    def _reset_deltas(self):
+        self.timeline = {}                           # customer_id -> [first, last, total]
+        self.beneficiaries = defaultdict(lambda: [0.0, 0])  # (customer_id, account) -> [total, count]
+        self.periods = defaultdict(lambda: [0, 0, 0, 0])    # customer_id -> counts in PERIODS order
+        self.pending_rows = 0
+
+    # --- Online store protocol ---
+
+    def warm(self, engine):
+        """Device counts per customer (for favorite_device); everything else is additive."""
+        device_counts = defaultdict(lambda: defaultdict(int))
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=50000).execute(Q_DEVICE_COUNTS)
+            for cid, dev, count in result:
+                device_counts[cid][dev] = int(count)
+        with self.lock:
+            # Warmed in the lifespan, before any traffic is recorded
+            self.device_counts = device_counts
+            self.is_warm = True
+        print(f"✅ Profile Updater warmed: device counts for {len(device_counts)} customers")
+
+    def record(self, row):
+        """Fold one logged transaction (dict keyed by column name) into the pending deltas."""
+        cid = row.get('customer_id')
+        ts = to_datetime(row.get('timestamp'))
+        amount = float(row.get('amount') or 0)
+        ben = row.get('beneficiary_account')
+        dev = row.get('device_id')
+        with self.lock:
+            span = self.timeline.get(cid)
+            if span is None:
+                self.timeline[cid] = [ts, ts, amount]
+            else:
+                span[0] = min(span[0], ts)
+                span[1] = max(span[1], ts)
+                span[2] += amount
+            if ben is not None:
+                pair = self.beneficiaries[(cid, ben)]
+                pair[0] += amount
+                pair[1] += 1
+            self.periods[cid][_period_index(ts.hour)] += 1
+            if dev is not None:
+                self.device_counts[cid][dev] += 1
+            self.pending_rows += 1
+            self.counters["recorded"] += 1
+
+    # --- Background flush / refresh ---
+
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="profile-updater", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and flush whatever is still pending (the view refresh is left to the schedule)."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(10)
+            self.thread = None
+        self.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+            if self.stale_stats and time.monotonic() - self.last_refresh >= self.refresh_interval:
+                self.refresh_stats()
+
+    def flush(self):
+        """Write the pending deltas in one transaction. -> rows flushed (0 on failure)."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending_rows:
+                    return 0
+                timeline, beneficiaries, periods, rows = self.timeline, self.beneficiaries, self.periods, self.pending_rows
+                self._reset_deltas()
+                favorites = {cid: _favorite(self.device_counts.get(cid)) for cid in periods}
+            try:
+                self._write(timeline, beneficiaries, periods, favorites)
+            except Exception as e:
+                self._restore(timeline, beneficiaries, periods, rows)
+                self.last_error = str(e)
+                self.counters["errors"] += 1
+                print(f"⚠️ Profile Updater: flush of {rows} rows failed, will retry. {e}")
+                return 0
+            self.counters["flushes"] += 1
+            self.counters["flushed_rows"] += rows
+            self.last_flush = time.monotonic()
+            self.stale_stats = True
+            return rows
+
+    def _write(self, timeline, beneficiaries, periods, favorites):
+        cids = list(timeline)
+        with self.engine.begin() as conn:
+            conn.execute(Q_UPSERT_TIMELINE, {
+                "customer_ids": cids,
+                "firsts": [timeline[c][0] for c in cids],
+                "lasts": [timeline[c][1] for c in cids],
+                "totals": [timeline[c][2] for c in cids],
+            })
+            if beneficiaries:
+                pairs = list(beneficiaries)
+                conn.execute(Q_UPSERT_BENEFICIARY, {
+                    "customer_ids": [cid for cid, _ in pairs],
+                    "beneficiaries": [ben for _, ben in pairs],
+                    "totals": [beneficiaries[p][0] for p in pairs],
+                    "counts": [beneficiaries[p][1] for p in pairs],
+                })
+            pcids = list(periods)
+            conn.execute(Q_UPSERT_DEVICE, {
+                "customer_ids": pcids,
+                "favorites": [favorites[c] for c in pcids],
+                **{period.lower(): [periods[c][i] for c in pcids] for i, period in enumerate(PERIODS)},
+            })
+            conn.execute(Q_DERIVE_TIMELINE, {"customer_ids": cids})
+            conn.execute(Q_DERIVE_BENEFICIARY, {"customer_ids": cids})
+
+    def _restore(self, timeline, beneficiaries, periods, rows):
+        """Put a failed flush back in front of whatever was recorded meanwhile."""
+        with self.lock:
+            for cid, (first, last, total) in timeline.items():
+                span = self.timeline.get(cid)
+                if span is None:
+                    self.timeline[cid] = [first, last, total]
+                else:
+                    span[0], span[1], span[2] = min(span[0], first), max(span[1], last), span[2] + total
+            for key, (total, count) in beneficiaries.items():
+                pair = self.beneficiaries[key]
+                pair[0] += total
+                pair[1] += count
+            for cid, counts in periods.items():
+                merged = self.periods[cid]
+                for i, n in enumerate(counts):
+                    merged[i] += n
+            self.pending_rows += rows
+
+    def refresh_stats(self):
+        """REFRESH MATERIALIZED VIEW CONCURRENTLY profile_customer_stats (skipped if another process is at it)."""
+        # The rows themselves reach `transactions` through the write-behind logger; a refresh right
+        # after a flush may miss the latest batch, so it only counts once the flush has settled
+        settled = time.monotonic() - self.last_flush >= self.flush_interval
+        try:
+            with self.engine.begin() as conn:
+                if not conn.execute(Q_REFRESH_LOCK).scalar():
+                    return False
+                conn.execute(Q_REFRESH_STATS)
+        except Exception as e:
+            self.last_error = str(e)
+            self.counters["errors"] += 1
+            print(f"⚠️ Profile Updater: profile_customer_stats refresh failed. {e}")
+            return False
+        finally:
+            self.last_refresh = time.monotonic()
+        self.stale_stats = not settled
+        self.counters["refreshes"] += 1
+        return True
+
+    def stats(self):
+        with self.lock:
+            out = dict(self.counters)
+            out["pending_rows"] = self.pending_rows
+        out.update({"is_warm": self.is_warm, "stale_customer_stats": self.stale_stats,
+                    "seconds_since_refresh": round(time.monotonic() - self.last_refresh, 1),
+                    "last_error": self.last_error})
+        return out
+
+
+def _period_index(hour):
+    """Index into PERIODS, same buckets as generate_data.calculate_time_period."""
+    if 5 <= hour < 12: return 0
+    elif 12 <= hour < 17: return 1
+    elif 17 <= hour < 22: return 2
+    else: return 3
+
+def _favorite(counts):
+    return max(counts, key=counts.get) if counts else None
@@ -0,0 +1,200 @@
+"""
+Named, parameterized SQL statements with a latency histogram each.
+
+    Q_DEVICE_USERS = register("device_users", "SELECT COUNT(DISTINCT customer_id) FROM transactions WHERE device_id = :device_id")
+    with engine.connect() as conn:
+        users = Q_DEVICE_USERS.execute(conn, {"device_id": dev}).scalar()
+    async with async_engine.connect() as conn:
+        users = (await Q_DEVICE_USERS.execute_async(conn, {"device_id": dev})).scalar()
+
+Values always travel as bind parameters, never as SQL text. Server-side preparation:
+  - asyncpg: SQLAlchemy's dialect already prepares and caches every statement per connection
+  - psycopg2: no driver support, so each statement is PREPAREd once per pooled connection and
+    then run with EXECUTE (parse/plan happen once; Postgres switches to a generic plan)
+DB_PREPARE_STATEMENTS=0 turns the psycopg2 PREPARE path off (plain bound parameters).
+Statements are preparable as long as they avoid expanding IN lists: use `= ANY(:ids)` with a list.
+"""
+import os
+import re
+import time
+import threading
+from bisect import bisect_left
+from sqlalchemy import text
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# `:name` placeholders (not `::type` casts)
+_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (plus count / sum / max), cheap enough for every call."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds, error=False):
+        ms = seconds * 1000
+        with self.lock:
+            self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+            self.calls += 1
+            self.errors += error
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (max_ms for the open bucket)."""
+        with self.lock:
+            rank = q / 100 * self.calls
+            seen = 0
+            for i, n in enumerate(self.buckets):
+                seen += n
+                if n and seen >= rank:
+                    return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 3)
+        return 0.0
+
+    def snapshot(self):
+        p50, p99 = self.percentile(50), self.percentile(99)
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "p50_ms": p50,
+                "p99_ms": p99,
+                "buckets": {f"le_{b}": n for b, n in zip(LATENCY_BUCKETS_MS, self.buckets)} | {"le_inf": self.buckets[-1]},
+            }
+
+
+class Statement:
+    """One registered query: the text() clause, its PREPARE form, and its histogram."""
+
+    def __init__(self, registry, name, sql):
+        self.registry = registry
+        self.name = name
+        self.sql = sql
+        self.clause = text(sql)
+        self.histogram = LatencyHistogram()
+        # PREPARE form: :name -> $n (a repeated name reuses its slot)
+        self.param_names = []
+        def positional(match):
+            if match.group(1) not in self.param_names:
+                self.param_names.append(match.group(1))
+            return f"${self.param_names.index(match.group(1)) + 1}"
+        self.prepared_sql = _PARAM.sub(positional, sql)
+
+    def execute(self, conn, params=None):
+        """Run on a sync Connection -> CursorResult (timed)."""
+        start = time.perf_counter()
+        try:
+            if self.registry.prepare and conn.dialect.driver == "psycopg2":
+                result = self._execute_prepared(conn, params or {})
+            else:
+                result = conn.execute(self.clause, params or {})
+        except Exception:
+            self.histogram.record(time.perf_counter() - start, error=True)
+            raise
+        self.histogram.record(time.perf_counter() - start)
+        return result
+
+    async def execute_async(self, conn, params=None):
+        """Run on an AsyncConnection -> Result (timed; asyncpg prepares and caches it itself)."""
+        start = time.perf_counter()
+        try:
+            result = await conn.execute(self.clause, params or {})
+        except Exception:
+            self.histogram.record(time.perf_counter() - start, error=True)
+            raise
+        self.histogram.record(time.perf_counter() - start)
+        return result
+
+    def frame(self, bind, params=None):
+        """Run on an Engine or Connection -> pandas DataFrame (for the Streamlit pages)."""
+        import pandas as pd
+        if hasattr(bind, "connect"):
+            with bind.connect() as conn:
+                return self.frame(conn, params)
+        result = self.execute(bind, params)
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+    def _execute_prepared(self, conn, params, retry=True):
+        # Prepared names live as long as the pooled DBAPI connection (conn.info is per connection):
+        # statement name -> True while usable, False once a failed EXECUTE invalidated it
+        prepared = conn.info.setdefault("prepared_statements", {})
+        server_name = f"q_{self.name}"
+        # Nothing of the caller's to lose if this statement is what opens the transaction
+        owns_transaction = not conn.in_transaction()
+        if not prepared.get(self.name):
+            if prepared.pop(self.name, None) is False:
+                # Still allocated on the server under the same name
+                conn.exec_driver_sql(f"DEALLOCATE {server_name}", execution_options={"no_parameters": True})
+            conn.exec_driver_sql(f"PREPARE {server_name} AS {self.prepared_sql}",
+                                 execution_options={"no_parameters": True})
+            prepared[self.name] = True
+        values = tuple(_adapt(params[name]) for name in self.param_names)
+        try:
+            if values:
+                return conn.exec_driver_sql(f"EXECUTE {server_name} ({', '.join(['%s'] * len(values))})", values)
+            return conn.exec_driver_sql(f"EXECUTE {server_name}", execution_options={"no_parameters": True})
+        except Exception as e:
+            prepared[self.name] = False
+            # "cached plan must not change result type" after generate_data.py reset the schema:
+            # roll back the transaction this statement opened and prepare it again, once. Inside a
+            # caller's transaction the error surfaces (a rollback would discard their work).
+            if retry and owns_transaction and _is_stale_plan(e):
+                conn.rollback()
+                return self._execute_prepared(conn, params, retry=False)
+            raise
+
+
+def _is_stale_plan(error):
+    """Postgres refused a prepared plan whose tables changed shape (SQLSTATE 0A000, feature_not_supported)."""
+    orig = getattr(error, "orig", None)
+    return getattr(orig, "pgcode", None) == "0A000" and "cached plan" in str(orig)
+
+
+class QueryRegistry:
+    def __init__(self, prepare=None):
+        if prepare is None:
+            prepare = os.getenv("DB_PREPARE_STATEMENTS", "1").lower() in ("1", "true", "yes")
+        self.prepare = prepare
+        self.lock = threading.Lock()
+        self.statements = {}
+
+    def register(self, name, sql):
+        """Add a named statement (registering the same name and SQL again returns the existing one)."""
+        with self.lock:
+            stmt = self.statements.get(name)
+            if stmt is not None:
+                if stmt.sql != sql:
+                    raise ValueError(f"Query {name!r} is already registered with different SQL")
+                return stmt
+            stmt = self.statements[name] = Statement(self, name, sql)
+            return stmt
+
+    def __getitem__(self, name):
+        return self.statements[name]
+
+    def stats(self):
+        """Per-statement latency histograms, slowest mean first."""
+        with self.lock:
+            statements = list(self.statements.values())
+        stats = {s.name: s.histogram.snapshot() for s in statements}
+        return dict(sorted(stats.items(), key=lambda kv: kv[1]["mean_ms"], reverse=True))
+
+
+def _adapt(value):
+    # psycopg2 sends lists as ARRAY[...] (what `= ANY(:ids)` wants); tuples would become records
+    return list(value) if isinstance(value, (tuple, set, frozenset)) else value
+
+
+# Process-wide registry (one per API worker / Streamlit server)
+registry = QueryRegistry()
+register = registry.register
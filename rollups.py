@@ -0,0 +1,207 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from collections import defaultdict
+from sqlalchemy import text
+from database import copy_rows
+from judges.graph_index import to_datetime
+from fraud_types import fraud_code
+
+# Bucket sizes of txn_rollups; bucket_id is an integer per grain
+#   hour / day: whole hours / days since EPOCH (naive, like `transactions.timestamp`)
+#   month:      year * 12 + month - 1
+GRAINS = ('hour', 'day', 'month')
+EPOCH = datetime(1970, 1, 1)
+GRAIN_SECONDS = {'hour': 3600, 'day': 86400}
+
+# Key columns, then the additive measures
+ROLLUP_KEYS = ['grain', 'bucket_id', 'city', 'fraud_code']
+ROLLUP_MEASURES = ['txns', 'volume', 'alerts', 'saved']
+
+Q_CREATE_ROLLUPS = text("""
+    CREATE TABLE txn_rollups (
+        grain VARCHAR(5) NOT NULL,
+        bucket_id INT NOT NULL,
+        city VARCHAR(50) NOT NULL,
+        fraud_code SMALLINT NOT NULL,
+        txns BIGINT NOT NULL DEFAULT 0,
+        volume FLOAT NOT NULL DEFAULT 0,
+        alerts BIGINT NOT NULL DEFAULT 0,
+        saved FLOAT NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, bucket_id, city, fraud_code)
+    )
+""")
+# Hourly groups straight from `transactions`; folded into all three grains in Python
+# (rows without a fraud_code keep their raw fraud_type, so it can be derived)
+Q_HOURLY_GROUPS = text("""
+    SELECT CAST(FLOOR(EXTRACT(EPOCH FROM timestamp) / 3600) AS INT) AS hour_id, city, is_fraud, fraud_code,
+           CASE WHEN fraud_code IS NULL THEN fraud_type END AS raw_type, COUNT(*), COALESCE(SUM(amount), 0)
+    FROM transactions WHERE timestamp IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+""")
+Q_UPSERT_ROLLUPS = text("""
+    INSERT INTO txn_rollups (grain, bucket_id, city, fraud_code, txns, volume, alerts, saved)
+    SELECT * FROM unnest(CAST(:grains AS text[]), CAST(:buckets AS int[]), CAST(:cities AS text[]),
+                         CAST(:fraud_codes AS smallint[]), CAST(:txns AS bigint[]), CAST(:volumes AS float8[]),
+                         CAST(:alerts AS bigint[]), CAST(:saved AS float8[]))
+    ON CONFLICT (grain, bucket_id, city, fraud_code) DO UPDATE SET
+        txns = txn_rollups.txns + EXCLUDED.txns,
+        volume = txn_rollups.volume + EXCLUDED.volume,
+        alerts = txn_rollups.alerts + EXCLUDED.alerts,
+        saved = txn_rollups.saved + EXCLUDED.saved
+""")
+
+
+def rollup_code(row):
+    """fraud_code of a logged row (assigned in api.log_transactions; derived if a writer left it out)."""
+    code = row.get('fraud_code')
+    return fraud_code(row.get('is_fraud'), row.get('fraud_type')) if code is None else code
+
+def bucket_id(grain, ts):
+    if grain == 'month':
+        return ts.year * 12 + ts.month - 1
+    return int((ts - EPOCH).total_seconds() // GRAIN_SECONDS[grain])
+
+def bucket_start(grain, bucket):
+    if grain == 'month':
+        return datetime(bucket // 12, bucket % 12 + 1, 1)
+    return EPOCH + timedelta(seconds=bucket * GRAIN_SECONDS[grain])
+
+def bucket_label(grain, bucket):
+    """Trend axis label: 2025-03 / 2025-03-14 / 9:00."""
+    start = bucket_start(grain, bucket)
+    if grain == 'month': return start.strftime('%Y-%m')
+    if grain == 'day': return start.strftime('%Y-%m-%d')
+    return f"{start.hour}:00"
+
+
+def rebuild(engine):
+    """(Re)create txn_rollups from `transactions` in one grouped pass (generate_data.py, after the load)."""
+    rollups = defaultdict(lambda: [0, 0.0, 0, 0.0])
+    with engine.connect() as conn:
+        for hour, city, is_fraud, code, raw_type, count, volume in conn.execute(Q_HOURLY_GROUPS):
+            start = bucket_start('hour', hour)
+            key = (city or '', code if code is not None else fraud_code(is_fraud, raw_type))
+            for grain, bucket in (('hour', hour), ('day', hour // 24), ('month', bucket_id('month', start))):
+                _add(rollups[(grain, bucket, *key)], count, volume, is_fraud == 1)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS txn_rollups"))
+        conn.execute(Q_CREATE_ROLLUPS)
+    copy_rows(engine, 'txn_rollups', ROLLUP_KEYS + ROLLUP_MEASURES, (key + tuple(m) for key, m in rollups.items()))
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE txn_rollups"))
+    return len(rollups)
+
+def _add(measures, count, volume, is_fraud):
+    measures[0] += count
+    measures[1] += volume
+    if is_fraud:
+        measures[2] += count
+        measures[3] += volume
+
+
+class RollupUpdater:
+    """
+    Keeps txn_rollups current as the API logs transactions. An online store: record(row) adds
+    the row to the in-memory deltas of its hour, day and month bucket, and a background thread
+    UPSERTs them (additive, so several API workers can flush into the same rows) every
+    `flush_interval` seconds. A failed flush keeps its deltas for the next attempt.
+    """
+
+    def __init__(self, engine, flush_interval=5.0):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.deltas = defaultdict(lambda: [0, 0.0, 0, 0.0])  # (grain, bucket, city, fraud_code) -> measures
+        self.pending_rows = 0
+        self.is_warm = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.counters = {"recorded": 0, "flushes": 0, "flushed_rows": 0, "errors": 0}
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, engine):
+        return cls(engine, flush_interval=float(os.getenv("ROLLUP_FLUSH_SECONDS", "5")))
+
+    # --- Online store protocol ---
+
+    def warm(self, engine):
+        """Nothing to load (the deltas are additive); checks that generate_data.py built the table."""
+        with engine.connect() as conn:
+            buckets = conn.execute(text("SELECT COUNT(*) FROM txn_rollups")).scalar()
+        self.is_warm = True
+        print(f"✅ Rollup Updater ready: {buckets} rollup rows")
+
+    def record(self, row):
+        ts = to_datetime(row.get('timestamp'))
+        amount = float(row.get('amount') or 0)
+        is_fraud = row.get('is_fraud') == 1
+        key = (row.get('city') or '', rollup_code(row))
+        with self.lock:
+            for grain in GRAINS:
+                _add(self.deltas[(grain, bucket_id(grain, ts), *key)], 1, amount, is_fraud)
+            self.pending_rows += 1
+            self.counters["recorded"] += 1
+
+    # --- Background flush ---
+
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="rollup-updater", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(10)
+            self.thread = None
+        self.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """UPSERT the pending deltas in one statement. -> rows flushed (0 on failure)."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending_rows:
+                    return 0
+                deltas, rows = self.deltas, self.pending_rows
+                self.deltas = defaultdict(lambda: [0, 0.0, 0, 0.0])
+                self.pending_rows = 0
+            keys = list(deltas)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(Q_UPSERT_ROLLUPS, {
+                        "grains": [k[0] for k in keys], "buckets": [k[1] for k in keys],
+                        "cities": [k[2] for k in keys], "fraud_codes": [k[3] for k in keys],
+                        "txns": [deltas[k][0] for k in keys], "volumes": [deltas[k][1] for k in keys],
+                        "alerts": [deltas[k][2] for k in keys], "saved": [deltas[k][3] for k in keys],
+                    })
+            except Exception as e:
+                with self.lock:
+                    for key, measures in deltas.items():
+                        merged = self.deltas[key]
+                        for i, value in enumerate(measures):
+                            merged[i] += value
+                    self.pending_rows += rows
+                self.last_error = str(e)
+                self.counters["errors"] += 1
+                print(f"⚠️ Rollup Updater: flush of {rows} rows failed, will retry. {e}")
+                return 0
+            self.counters["flushes"] += 1
+            self.counters["flushed_rows"] += rows
+            return rows
+
+    def stats(self):
+        with self.lock:
+            out = dict(self.counters)
+            out["pending_rows"] = self.pending_rows
+            out["pending_buckets"] = len(self.deltas)
+        out.update({"is_warm": self.is_warm, "last_error": self.last_error})
+        return out
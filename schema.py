@@ -0,0 +1,69 @@
+"""
+Idempotent upgrades for a database generated before the current generate_data.py, run by the
+API at startup. Each step checks the catalog first, so on an up-to-date database this is a few
+lookups; workers starting together take turns on an advisory lock.
+  - transactions.fraud_code, backfilled from (is_fraud, fraud_type) when the column is added
+  - unique keys behind the profile upserts (profile_updater.py) and the concurrent view refresh
+  - txn_rollups, built from `transactions` when it does not exist (rollups.py)
+"""
+from sqlalchemy import text
+from fraud_types import fraud_code
+import rollups
+
+# Arbitrary key of the session advisory lock held while upgrading
+UPGRADE_LOCK_ID = 7_023_001
+
+# Table -> columns of the unique key the API's ON CONFLICT / REFRESH CONCURRENTLY rely on
+UNIQUE_KEYS = {
+    'profile_beneficiary': ('customer_id', 'beneficiary_account'),
+    'profile_timeline': ('customer_id',),
+    'profile_device_usage': ('customer_id',),
+    'profile_customer_stats': ('customer_id',),
+}
+
+Q_HAS_COLUMN = text("""
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column
+""")
+Q_HAS_UNIQUE = text("SELECT 1 FROM pg_index WHERE indrelid = CAST(:table AS regclass) AND indisunique LIMIT 1")
+Q_EXISTS = text("SELECT to_regclass(:table) IS NOT NULL")
+Q_FRAUD_PAIRS = text("SELECT DISTINCT is_fraud, fraud_type FROM transactions")
+# NULLs compared through COALESCE so the join stays hashable
+Q_BACKFILL_CODES = text("""
+    UPDATE transactions t SET fraud_code = c.code
+    FROM unnest(CAST(:flags AS int[]), CAST(:types AS text[]), CAST(:codes AS smallint[])) AS c(is_fraud, fraud_type, code)
+    WHERE COALESCE(t.is_fraud, -1) = c.is_fraud AND COALESCE(t.fraud_type, '') = c.fraud_type
+""")
+
+
+def upgrade(engine):
+    """Bring an older database up to the current schema. -> names of the steps applied."""
+    applied = []
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": UPGRADE_LOCK_ID})
+        try:
+            with engine.begin() as conn:
+                if not conn.execute(Q_HAS_COLUMN, {"table": "transactions", "column": "fraud_code"}).first():
+                    conn.execute(text("ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fraud_code SMALLINT"))
+                    _backfill_fraud_codes(conn)
+                    applied.append("transactions.fraud_code")
+                for table, columns in UNIQUE_KEYS.items():
+                    if conn.execute(Q_EXISTS, {"table": table}).scalar() and not conn.execute(Q_HAS_UNIQUE, {"table": table}).first():
+                        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_pk ON {table} ({', '.join(columns)})"))
+                        applied.append(f"{table}_pk")
+                build_rollups = not conn.execute(Q_EXISTS, {"table": "txn_rollups"}).scalar()
+            if build_rollups:
+                rollups.rebuild(engine)
+                applied.append("txn_rollups")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": UPGRADE_LOCK_ID})
+            lock_conn.commit()
+    return applied
+
+def _backfill_fraud_codes(conn):
+    pairs = conn.execute(Q_FRAUD_PAIRS).fetchall()
+    conn.execute(Q_BACKFILL_CODES, {
+        "flags": [-1 if is_fraud is None else is_fraud for is_fraud, _ in pairs],
+        "types": [fraud_type or '' for _, fraud_type in pairs],
+        "codes": [fraud_code(is_fraud, fraud_type) for is_fraud, fraud_type in pairs],
+    })
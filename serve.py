@@ -0,0 +1,105 @@
+"""
+Pre-fork server for the scoring API.
+
+    python serve.py --workers 4 --port 8000
+
+`uvicorn api:app --workers N` spawns fresh interpreters, so every worker imports api.py
+and joblib-loads (and compiles) its own copy of both models. Here the parent imports api.py
+once, freezes the heap, binds the socket and forks the workers: the model arrays are
+inherited copy-on-write and stay physically shared, since scoring only reads them.
+Per-worker state (DB pools, online stores, customer cache, txn logger) is created after
+the fork, in each worker's lifespan.
+With the judges/models/<name>/ artifacts the arrays are mmapped .npy files, so they are
+shared through the page cache even between separately started processes.
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    import uvicorn
+    from database import dispose_engines
+
+    # Pools inherited from the parent belong to the parent: forget them without closing
+    dispose_engines(close=False)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(app, sock, log_level):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock, log_level)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork FinSentinel API server")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "2")))
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import api
+    api.load_models()  # once, in the parent: the workers inherit the loaded judges
+    print(f"✅ Models loaded in parent in {time.perf_counter() - start:.2f}s")
+
+    sock = bind_socket(args.host, args.port)
+    # Move everything allocated so far out of the GC's reach, so collections in the
+    # workers don't write to (and un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+    workers = {spawn(api.app, sock, args.log_level) for _ in range(args.workers)}
+    print(f"🚀 Serving on http://{args.host}:{args.port} with {len(workers)} workers (pids {sorted(workers)})")
+
+    stopping = False
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Supervise: replace workers that die unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited ({status}), restarting")
+            workers.add(spawn(api.app, sock, args.log_level))
+    sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
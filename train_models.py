@@ -162,6 +162,8 @@ def train():
     joblib.dump(auditor_pipeline, 'judges/models/auditor.pkl')
     
     print("✅ DONE. Models saved to 'judges/models/'. Ready for Real-Time Inference.")
+    # The judges serve rf_pattern / iso_anomaly (pickle + mmap artifact, see judges/model_artifacts.py)
+    print("   To serve them: copy to judges/models/rf_pattern.pkl / iso_anomaly.pkl, then run python -m judges.model_artifacts")
 
 if __name__ == "__main__":
     train()
\ No newline at end of file
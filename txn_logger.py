@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from sqlalchemy import text
+from database import copy_rows
+
+TXN_COLUMNS = ["customer_id", "customer_name", "amount", "timestamp", "device_id", "beneficiary_account",
+               "customer_account_number", "city", "payment_method_detail", "is_fraud", "fraud_type",
+               "fraud_code"]
+
+TXN_INSERT_SQL = text(f"""
+    INSERT INTO transactions ({", ".join(TXN_COLUMNS)})
+    VALUES ({", ".join(":" + c for c in TXN_COLUMNS)})
+""")
+
+
+class TransactionLogger:
+    """
+    Write-behind logger for scored transactions.
+    Requests enqueue rows and return immediately; a background thread writes them in batches
+    (multi-row INSERT, or COPY) once `batch_size` rows are waiting or `flush_interval` has passed.
+      - Backpressure: the queue is bounded. A producer waits at most `put_timeout` for space,
+        then the row goes to the local spill file instead of being dropped.
+      - Durability: a batch Postgres rejects (down / slow / timeout) is appended to the spill
+        file (JSONL) and replayed after the next successful flush.
+      - Poison rows: a chunk Postgres rejects for its data (DataError / IntegrityError, e.g. a
+        value too long for its column) is retried in halves down to single rows; the rows that
+        still fail go to the dead-letter file (JSONL, with the error) instead of blocking the rest.
+      - stop() drains the queue and flushes everything (FastAPI shutdown, atexit).
+    Delivery is at-least-once: a crash in the middle of a replay can write a spilled row twice.
+    """
+
+    def __init__(self, engine, batch_size=500, flush_interval=0.5, max_queue=10000,
+                 put_timeout=0.05, method="insert", spill_path="txn_spill.jsonl",
+                 dead_letter_path="txn_dead_letter.jsonl"):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.method = method
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.spill_lock = threading.Lock()
+        self.replay_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.exit_hook = False
+        self.counters = {"queued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0,
+                         "dead_lettered": 0, "errors": 0}
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, engine):
+        return cls(
+            engine,
+            batch_size=int(os.getenv("TXN_LOG_BATCH_SIZE", "500")),
+            flush_interval=int(os.getenv("TXN_LOG_FLUSH_MS", "500")) / 1000,
+            max_queue=int(os.getenv("TXN_LOG_MAX_QUEUE", "10000")),
+            method=os.getenv("TXN_LOG_METHOD", "insert"),
+            spill_path=os.getenv("TXN_LOG_SPILL_PATH", "txn_spill.jsonl"),
+            dead_letter_path=os.getenv("TXN_LOG_DEAD_LETTER_PATH", "txn_dead_letter.jsonl"),
+        )
+
+    # --- Producer side (request handlers) ---
+
+    def log(self, rows, timeout=None):
+        """Queue rows (dicts keyed by column). timeout=0 never blocks (async handlers)."""
+        if self.thread is None:
+            self.start()
+        timeout = self.put_timeout if timeout is None else timeout
+        overflow = []
+        for row in rows:
+            try:
+                if timeout:
+                    self.queue.put(row, timeout=timeout)
+                else:
+                    self.queue.put_nowait(row)
+            except queue.Full:
+                overflow.append(row)
+        self._bump("queued", len(rows) - len(overflow))
+        if overflow:
+            self._spill(overflow)
+
+    # --- Consumer side (background thread) ---
+
+    def start(self):
+        if self.thread is not None and self.stop_event.is_set():
+            # A stop() that timed out: let that writer finish its write before starting another
+            self.thread.join()
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="txn-logger", daemon=True)
+            self.thread.start()
+            if not self.exit_hook:
+                atexit.register(self.stop)
+                self.exit_hook = True
+        return self
+
+    def stop(self, timeout=10):
+        """Stop the writer thread and flush whatever is still queued."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                # Still inside a write: flushing now would race it. Queue and spill stay for the next start.
+                print(f"⚠️ Txn Logger: writer still busy after {timeout}s, {self.queue.qsize()} queued rows left for the next start.")
+                return
+            self.thread = None
+        self.flush()
+
+    def flush(self):
+        """Synchronously drain the queue (batch by batch) and retry the spill file."""
+        while True:
+            batch = self._take(self.batch_size, wait=0)
+            if not batch:
+                break
+            self._write(batch)
+        self._replay_spill()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = self._take(self.batch_size, wait=self.flush_interval)
+            if batch:
+                if self._write(batch):
+                    self._replay_spill()
+                else:
+                    time.sleep(self.flush_interval)  # back off while Postgres is unhealthy
+            elif os.path.exists(self.spill_path):
+                self._replay_spill()
+
+    def _take(self, max_rows, wait):
+        """Collect up to max_rows; wait at most `wait` seconds (size OR time trigger)."""
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        written, unwritten, error = self._write_rows(batch)
+        self._bump("written", written)
+        if written:
+            self._bump("batches", 1)
+        if unwritten:
+            self.last_error = str(error)
+            self._bump("errors", 1)
+            print(f"⚠️ Txn Logger: flush of {len(unwritten)} rows failed, spilling to {self.spill_path}. {error}")
+            self._spill(unwritten)
+            return False
+        return True
+
+    def _write_rows(self, rows):
+        """
+        Insert rows, isolating the ones Postgres rejects for their data (dead-lettered).
+        -> (rows written, rows left unwritten by a transient failure, that error). The
+        unwritten rows are in their original order; nothing before them is written twice.
+        """
+        written = 0
+        pieces = [rows]  # stack, next piece last
+        while pieces:
+            piece = pieces.pop()
+            try:
+                self._insert(piece)
+                written += len(piece)
+            except Exception as e:
+                if not _is_rejection(e):
+                    return written, [row for p in [piece, *reversed(pieces)] for row in p], e
+                if len(piece) == 1:
+                    self._dead_letter(piece[0], e)
+                else:
+                    mid = len(piece) // 2
+                    pieces.extend([piece[mid:], piece[:mid]])
+        return written, [], None
+
+    def _insert(self, batch):
+        if self.method == "copy":
+            copy_rows(self.engine, "transactions", TXN_COLUMNS, ([row.get(c) for c in TXN_COLUMNS] for row in batch))
+        else:
+            with self.engine.begin() as conn:
+                conn.execute(TXN_INSERT_SQL, [{c: row.get(c) for c in TXN_COLUMNS} for row in batch])
+
+    # --- Spill file (local durability) and dead letters ---
+
+    def _dead_letter(self, row, error):
+        # The driver's message (the SQLAlchemy wrapper repeats the statement and parameters)
+        reason = str(getattr(error, "orig", None) or error).strip()
+        with self.spill_lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"row": row, "error": reason}, default=_json_default) + "\n")
+        self.last_error = reason
+        self._bump("dead_lettered", 1)
+        print(f"⚠️ Txn Logger: row rejected by Postgres, moved to {self.dead_letter_path}. {reason.splitlines()[0]}")
+
+    def _spill(self, rows):
+        with self.spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=_json_default) + "\n")
+        self._bump("spilled", len(rows))
+
+    def _replay_spill(self):
+        # One replay at a time (writer thread and stop()/flush() callers): a second one would fold
+        # the new spill into the .replay file the first is still reading and insert it twice
+        with self.replay_lock:
+            replay_path = self.spill_path + ".replay"
+            with self.spill_lock:
+                if os.path.exists(self.spill_path):
+                    if os.path.exists(replay_path):
+                        # Left over from a crash mid-replay: fold the new spill into it
+                        with open(self.spill_path, encoding="utf-8") as src, open(replay_path, "a", encoding="utf-8") as dst:
+                            dst.write(src.read())
+                        os.remove(self.spill_path)
+                    else:
+                        os.replace(self.spill_path, replay_path)
+                elif not os.path.exists(replay_path):
+                    return
+            with open(replay_path, encoding="utf-8") as f:
+                pending = [json.loads(line) for line in f if line.strip()]
+
+            for i in range(0, len(pending), self.batch_size):
+                written, unwritten, error = self._write_rows(pending[i:i + self.batch_size])
+                self._bump("replayed", written)
+                if unwritten:
+                    self.last_error = str(error)
+                    self._bump("errors", 1)
+                    # Put the unwritten tail back for the next attempt
+                    with self.spill_lock:
+                        with open(self.spill_path, "a", encoding="utf-8") as f:
+                            for row in unwritten + pending[i + self.batch_size:]:
+                                f.write(json.dumps(row, default=_json_default) + "\n")
+                    break
+            os.remove(replay_path)
+
+    def _bump(self, key, n):
+        with self.stats_lock:
+            self.counters[key] += n
+
+    def stats(self):
+        with self.stats_lock:
+            out = dict(self.counters)
+        out.update({"queue_depth": self.queue.qsize(), "queue_capacity": self.queue.maxsize,
+                    "spill_pending": os.path.exists(self.spill_path),
+                    "dead_letter_path": self.dead_letter_path, "last_error": self.last_error})
+        return out
+
+
+def _is_rejection(error):
+    """
+    True if Postgres refused the rows themselves (DB-API DataError / IntegrityError: value too
+    long, bad type, constraint), which no retry fixes; connection trouble etc. is transient.
+    Checked by class name on the driver exception so psycopg2, psycopg 3 and the
+    SQLAlchemy wrappers all match.
+    """
+    for exc in (error, getattr(error, "orig", None)):
+        if exc is not None and any(cls.__name__ in ("DataError", "IntegrityError") for cls in type(exc).__mro__):
+            return True
+    return False
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)